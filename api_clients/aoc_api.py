@@ -2,6 +2,8 @@ import aiohttp
 from typing import Any, Dict, Optional
 from decouple import config
 
+from utils.tracing import traced
+
 class AdventOfCodeAPI:
     """
     Standalone Advent of Code private leaderboard client.
@@ -43,6 +45,7 @@ class AdventOfCodeAPI:
             leaderboard_id=self.leaderboard_id,
         )
 
+    @traced("http")
     async def get_leaderboard(self) -> Dict[str, Any]:
         """
         Fetch and return the leaderboard JSON as a dict.
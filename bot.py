@@ -1,92 +1,245 @@
-import subprocess
+# Installed before any other import so STARTUP_PROFILE=1 can time every module import
+from utils.startup_profile import profiler
+profiler.install()
+
+import time
+import logging
+from typing import Callable
 
 import asyncio
 import discord
 from decouple import config
 from discord.ext import commands
-from utils.embed_handler import simple_embed
+from utils.embed_handler import simple_embed, embed_stats
+from utils.member_cache import MemberCache, DisplayNameResolver
+from utils.outbound import OutboundQueue
+from utils.paste import PasteService
+from utils.lifecycle import Lifecycle
+from utils.log import setup_logging, parse_sample_rates
+from utils.misc import BoundedSet, resolve_build_version
+from utils.tracing import CommandTracer, SnappyCommandTree
 
-from constants import system_log_channel_id
+from constants import (
+    max_message_length,
+    tortoise_paste_endpoint,
+    tortoise_paste_service_link,
+)
 from utils.manager import (
     AFKManager,
     PointsManager,
+    SettingsManager,
+    StatusManager,
     Database,
 )
 
 TOKEN = config("DISCORD_BOT_TOKEN")
 DB_URL = config("DB_URL")
+# "full" keeps every member resident and chunks guilds at startup,
+# "lazy" skips chunking and only keeps recently active members in a bounded LRU.
+MEMBER_CACHE_POLICY = config("MEMBER_CACHE_POLICY", "full")
+MEMBER_CACHE_SIZE = config("MEMBER_CACHE_SIZE", "5000", cast=int)
+# Unset lets Discord pick the shard count. A cluster supervisor (cluster.py) sets both
+# so every process only connects the shards it owns.
+SHARD_COUNT = config("SHARD_COUNT", "", cast=lambda v: int(v) if v else None)
+SHARD_IDS = config("SHARD_IDS", "", cast=lambda v: [int(i) for i in v.split(",") if i.strip()] or None)
+# Upper bound for flushing outbound messages and finishing task loops on SIGTERM
+SHUTDOWN_DRAIN_SECONDS = config("SHUTDOWN_DRAIN_SECONDS", "10", cast=float)
+# How long /ready answers 503 before the health server stops, so load balancers notice
+SHUTDOWN_UNREADY_GRACE_SECONDS = config("SHUTDOWN_UNREADY_GRACE_SECONDS", "5", cast=float)
+# 429s longer than this raise RateLimited instead of being slept through inside the request,
+# so the outbound queue parks just that route. discord.py doesn't accept less than 30.
+MAX_RATELIMIT_TIMEOUT = config("MAX_RATELIMIT_TIMEOUT", "30", cast=float)
+# Slash commands that haven't responded after this many seconds are deferred for them, 0 disables
+AUTO_DEFER_BUDGET = config("AUTO_DEFER_BUDGET", "2.0", cast=float)
+# Overridable so the paste offload can be pointed at a local stand-in server
+PASTE_ENDPOINT = config("PASTE_ENDPOINT", tortoise_paste_endpoint)
+PASTE_LINK = config("PASTE_LINK", tortoise_paste_service_link)
+# Writes made while Postgres is unreachable are journaled here and replayed on recovery
+JOURNAL_PATH = config("JOURNAL_PATH", "./data/journal.sqlite3")
+LOG_LEVEL = config("LOG_LEVEL", "INFO")
+# Records waiting for the log writer thread, beyond that they are dropped instead of blocking
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", "10000", cast=int)
+# "logger=rate,..." overriding the default sampling of high-volume loggers
+LOG_SAMPLE_RATES = config("LOG_SAMPLE_RATES", "", cast=lambda v: parse_sample_rates(v) if v else None)
 
+log = logging.getLogger("snappy")
 
-class MyBot(commands.Bot):
+
+class MyBot(commands.AutoShardedBot):
     def __init__(self):
         self.db = None
         self.points_manager = None
         self.afk_manager = None
+        self.status_manager = None
+        self.settings_manager = None
         self.build_version = None
+        self.restart_announced = False
+        self._sync_task: asyncio.Task | None = None
+        self.started_at = time.perf_counter()
+        self.time_to_ready: float | None = None
+        self.member_cache = MemberCache(max_size=MEMBER_CACHE_SIZE)
+        self.display_names = DisplayNameResolver(self.member_cache)
+        self.outbound = OutboundQueue()
+        self.paste = PasteService(PASTE_ENDPOINT, PASTE_LINK, threshold=max_message_length)
+        self.lifecycle = Lifecycle(
+            self, drain_timeout=SHUTDOWN_DRAIN_SECONDS, unready_grace=SHUTDOWN_UNREADY_GRACE_SECONDS
+        )
+        self.tracer = CommandTracer(auto_defer_budget=AUTO_DEFER_BUDGET)
+        # Cogs register callables returning JSON-serializable stats for /health
+        self.health_metrics: dict[str, Callable[[], dict]] = {}
         intents = discord.Intents.default()
         intents.members = True
         intents.message_content = True
         intents.messages = True
-        self.suppressed_deletes: set[int] = set()
+        # Message IDs purged by moderation, delete-log listeners skip them
+        self.suppressed_deletes = BoundedSet(10_000)
+        # Process owning shard 0 syncs application commands
+        self.is_primary = SHARD_IDS is None or 0 in SHARD_IDS
+
+        member_cache_options = {}
+        if MEMBER_CACHE_POLICY == "lazy":
+            member_cache_options = {
+                "member_cache_flags": discord.MemberCacheFlags.none(),
+                "chunk_guilds_at_startup": False,
+            }
 
         super().__init__(
             command_prefix="!",
             intents=intents,
+            tree_cls=SnappyCommandTree,
+            shard_count=SHARD_COUNT,
+            shard_ids=SHARD_IDS,
+            max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT,
+            **member_cache_options,
         )
 
+        self.health_metrics["member_cache"] = lambda: {
+            "policy": MEMBER_CACHE_POLICY,
+            "time_to_ready_seconds": self.time_to_ready,
+            **self.member_cache.stats(),
+        }
+        self.health_metrics["display_names"] = self.display_names.stats
+        self.health_metrics["embeds"] = lambda: dict(embed_stats)
+        self.health_metrics["outbound"] = self.outbound.stats
+        self.health_metrics["paste"] = self.paste.stats
+        self.health_metrics["commands"] = self.tracer.stats
+        self.health_metrics["startup"] = profiler.report
+
+    async def load_extension(self, name: str, *, package: str | None = None) -> None:
+        with profiler.phase(name, group="cogs"):
+            await super().load_extension(name, package=package)
+
+    async def _sync_commands(self):
+        await self.tree.sync()
+        log.info("Synced application commands")
+
     async def setup_hook(self) -> None:
-        self.db = Database(DB_URL)
-        await self.db.connect()
+        profiler.milestone("login")
+        self.outbound.start()
+        self.db = Database(DB_URL, journal_path=JOURNAL_PATH)
+
+        # Independent of each other, the git fallback of the version lookup is a subprocess
+        with profiler.phase("database_connect"):
+            self.build_version, _ = await asyncio.gather(resolve_build_version(), self.db.connect())
 
         self.afk_manager = AFKManager(self.db)
         self.points_manager = PointsManager(self.db)
+        self.status_manager = StatusManager(self.db)
+        self.settings_manager = SettingsManager(self.db)
 
-        await self.afk_manager.setup()
-        await self.points_manager.setup()
+        with profiler.phase("managers_setup"):
+            await self.settings_manager.setup()
+            await self.afk_manager.setup()
+            await self.points_manager.setup()
+            await self.status_manager.setup()
+        self.db.bus.start()
+        self.db.resume()
+        self.health_metrics["invalidation_bus"] = self.db.bus.stats
+        self.health_metrics["database"] = self.db.stats
+        self.health_metrics["settings"] = self.settings_manager.stats
 
         # ---------- COGS ----------
         await self.load_extension("cogs.leaderboard")
         await self.load_extension("cogs.status")
         await self.load_extension("cogs.afk")
         await self.load_extension("cogs.health_check")
+        await self.load_extension("cogs.data_transfer")
+        await self.load_extension("cogs.honeypot")
+        await self.load_extension("cogs.rules")
+        await self.load_extension("cogs.settings")
+        await self.load_extension("cogs.member_count")
+        await self.load_extension("cogs.onboarding")
+        # Loads cogs.advent_of_code around December
+        await self.load_extension("cogs.seasonal")
 
-        await self.tree.sync()
-        print("✅ Synced application commands")
+        if self.is_primary:
+            # Runs alongside the gateway connect instead of delaying it
+            self._sync_task = asyncio.create_task(self._sync_commands())
 
 
 bot = MyBot()
 
 async def send_restart_message(client: commands.Bot):
-    try:
-        commit_hash = subprocess.check_output(
-            ["git", "rev-parse", "--short", "HEAD"],
-            stderr=subprocess.DEVNULL,
-        ).decode().strip()
-    except Exception:
-        commit_hash = config("BOT_BUILD_VERSION", "mystery-build")
-
-    channel = client.get_channel(system_log_channel_id)
-    client.build_version = commit_hash
-
-    if channel is None:
+    # on_ready fires again after every reconnect, announce once per process.
+    # Every guild lives on exactly one process so each process announces in its own guilds.
+    if client.restart_announced:
         return
+    client.restart_announced = True
 
-    try:
-        embed = simple_embed(message=f"Build version: `{commit_hash}`", title="", color=discord.Color.teal())
-        embed.set_footer(text=f"🔄 Bot Restarted")
-        await channel.send(
+    embed = simple_embed(message=f"Build version: `{client.build_version}`", title="", color=discord.Color.teal())
+    embed.set_footer(text=f"🔄 Bot Restarted")
+    for guild in client.guilds:
+        channel = guild.get_channel(client.settings_manager.get(guild.id, "system_log_channel_id"))
+        if channel is None:
+            continue
+        # A Forbidden channel is dropped by the queue
+        client.outbound.send(
+            channel,
             embed=embed,
         )
-    except discord.Forbidden:
-        pass
+
+
+@bot.event
+async def on_connect():
+    profiler.milestone("gateway_connect")
 
 
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+    if bot.time_to_ready is None:
+        bot.time_to_ready = round(time.perf_counter() - bot.started_at, 2)
+        profiler.milestone("ready")
+        profiler.uninstall()
+        if profiler.enabled:
+            log.info("Startup profile", extra={"startup": profiler.report()})
+    log.info(
+        "Logged in as %s (ID: %s) in %ss",
+        bot.user,
+        bot.user.id,
+        bot.time_to_ready,
+        extra={"member_cache": MEMBER_CACHE_POLICY, "shard_ids": bot.shard_ids},
+    )
     await send_restart_message(bot)
 
 
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    bot.tracer.finish(interaction)
+
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.display_name != after.display_name:
+        bot.display_names.invalidate(after.guild.id, after.id)
+
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    # The raw event fires for uncached members too, which the lazy policy mostly has
+    bot.member_cache.forget(payload.guild_id, payload.user.id)
+    bot.display_names.invalidate(payload.guild_id, payload.user.id)
+
+
 @bot.event
 async def on_message(message: discord.Message):
     if message.author.bot:
@@ -101,12 +254,21 @@ async def on_message(message: discord.Message):
             pass
         return
 
+    if isinstance(message.author, discord.Member):
+        bot.member_cache.touch(message.author)
+
     await bot.process_commands(message)
 
 
 async def main():
+    logs = setup_logging(LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES)
+    bot.health_metrics["logging"] = logs.stats
+
     async with bot:
+        bot.lifecycle.install()
         await bot.start(TOKEN)
+        # start() returns once the gateway is closed, the database phase is still running
+        await bot.lifecycle.wait_closed()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""
+Runs the bot as a cluster of shard processes.
+
+Every process runs bot.py with its own SHARD_IDS slice and health server port,
+crashed processes are restarted with a backoff. The process owning shard 0 is
+the primary one (syncs commands, announces restarts).
+
+    SHARD_COUNT=8 CLUSTER_PROCESSES=2 python cluster.py
+"""
+import logging
+import os
+import sys
+import signal
+import asyncio
+from pathlib import Path
+from contextlib import suppress
+
+from decouple import config
+
+from utils.log import setup_logging
+
+log = logging.getLogger("snappy.cluster")
+
+SHARD_COUNT = config("SHARD_COUNT", cast=int)
+CLUSTER_PROCESSES = config("CLUSTER_PROCESSES", "2", cast=int)
+BASE_PORT = config("PORT", "8080", cast=int)
+MAX_BACKOFF_SECONDS = 60
+# A process that ran this long was healthy, its next crash starts the backoff over
+HEALTHY_RUN_SECONDS = 300
+# Next to this file, so the supervisor can be started from any working directory
+BOT_SCRIPT = Path(__file__).resolve().parent / "bot.py"
+
+
+def shard_slices(shard_count: int, processes: int) -> list[list[int]]:
+    return [list(range(shard_count))[i::processes] for i in range(processes)]
+
+
+async def run_process(index: int, shard_ids: list[int], stopping: asyncio.Event):
+    env = {
+        **os.environ,
+        "SHARD_COUNT": str(SHARD_COUNT),
+        "SHARD_IDS": ",".join(map(str, shard_ids)),
+        "PORT": str(BASE_PORT + index),
+    }
+    backoff = 1
+
+    while not stopping.is_set():
+        started = asyncio.get_running_loop().time()
+        process = await asyncio.create_subprocess_exec(sys.executable, str(BOT_SCRIPT), env=env)
+        log.info("Cluster process %s started", index, extra={"shard_ids": shard_ids, "pid": process.pid})
+
+        stop_task = asyncio.create_task(stopping.wait())
+        wait_task = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_task, wait_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stopping.is_set():
+            if process.returncode is None:
+                process.send_signal(signal.SIGTERM)
+                await process.wait()
+            wait_task.cancel()
+            return
+
+        stop_task.cancel()
+        if asyncio.get_running_loop().time() - started >= HEALTHY_RUN_SECONDS:
+            backoff = 1
+        log.warning(
+            "Cluster process %s exited with %s, restarting in %ss", index, process.returncode, backoff,
+            extra={"shard_ids": shard_ids},
+        )
+        # A SIGTERM during the backoff ends it right away
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stopping.wait(), timeout=backoff)
+        backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+
+async def main():
+    setup_logging()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await asyncio.gather(*(
+        run_process(index, shard_ids, stopping)
+        for index, shard_ids in enumerate(shard_slices(SHARD_COUNT, CLUSTER_PROCESSES))
+    ))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,6 +7,7 @@ from discord import app_commands
 
 from api_clients.aoc_api import AdventOfCodeAPI
 from utils.misc import format_timedelta
+from utils.aoc_season import aoc_now, last_puzzle_day, poll_interval_minutes
 from utils.embed_handler import info, failure
 
 
@@ -16,18 +17,25 @@ class AdventOfCode(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Loaded by cogs.seasonal during the event only, so the year is the current one
+        self.year = aoc_now().year
         self.aoc_api = AdventOfCodeAPI(
             leaderboard_id=self.TORTOISE_LEADERBOARD_ID,
-            year=2025,
+            year=self.year,
         )
         self._leaderboard_cache = None
         self.update_leaderboard_cache.start()
 
+    def cog_unload(self):
+        self.update_leaderboard_cache.cancel()
+        # The payload holds every member's per-day completion data, don't keep it around
+        self._leaderboard_cache = None
 
     @tasks.loop(minutes=30)
     async def update_leaderboard_cache(self):
-        """Periodically refresh the AoC leaderboard cache."""
+        """Refreshes the AoC leaderboard cache, more often right after a puzzle unlocks."""
         self._leaderboard_cache = await self.aoc_api.get_leaderboard()
+        self.update_leaderboard_cache.change_interval(minutes=poll_interval_minutes(aoc_now()))
 
     @update_leaderboard_cache.before_loop
     async def before_update_leaderboard_cache(self):
@@ -49,7 +57,7 @@ class AdventOfCode(commands.Cog):
                 f"Use this code to join Tortoise AoC leaderboard: "
                 f"**{self.TORTOISE_LEADERBOARD_INVITE}**\n\n"
                 "To join you can go to the AoC website: "
-                "https://adventofcode.com/2025/leaderboard/private"
+                f"https://adventofcode.com/{self.year}/leaderboard/private"
             ),
             title="Tortoise AoC",
             member=member
@@ -58,9 +66,11 @@ class AdventOfCode(commands.Cog):
 
     @app_commands.command(
         name="aoc_leaderboard",
-        description="Show the Tortoise Advent of Code leaderboard (cached)."
+        description="Show the Tortoise Advent of Code leaderboard (cached).",
+        extras={"defer_ephemeral": True},
     )
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(full="Show every member instead of the top 10")
+    async def leaderboard(self, interaction: discord.Interaction, full: bool = False):
         """Shows Tortoise leaderboard."""
         guild = interaction.guild
         if guild is None:
@@ -86,7 +96,7 @@ class AdventOfCode(commands.Cog):
         }
 
         leaderboard_lines = ["```py"]
-        num_of_members = 10
+        num_of_members = len(sorted_members) if full else 10
         position_counter = 0
 
         for member_id, member_data in sorted_members.items():
@@ -102,9 +112,20 @@ class AdventOfCode(commands.Cog):
 
         leaderboard_lines.append("```")
         leaderboard_text = "\n".join(leaderboard_lines)
+        if self.bot.paste.too_long(leaderboard_text):
+            # The upload can outlast the auto-defer budget, which would defer ephemerally
+            # for the error replies above, the leaderboard itself is public
+            await interaction.response.defer()
+        # The paste gets the ranking without the code block markers
+        leaderboard_text = await self.bot.paste.fit(
+            leaderboard_text,
+            "\n".join(leaderboard_lines[1:-1]),
+            notice=f"The ranking of {len(leaderboard_lines) - 2} members is too long to show here: {{link}}",
+        )
 
         embed = info(
-            f"{leaderboard_text}\n\nThe leaderboard is refreshed every 30 minutes.",
+            f"{leaderboard_text}\n\nThe leaderboard is refreshed every "
+            f"{poll_interval_minutes(aoc_now())} minutes.",
             member=guild.me,
             title="Tortoise AoC leaderboard"
         )
@@ -112,7 +133,8 @@ class AdventOfCode(commands.Cog):
 
     @app_commands.command(
         name="aoc_countdown",
-        description="Time until the next Advent of Code challenge starts."
+        description="Time until the next Advent of Code challenge starts.",
+        extras={"defer_ephemeral": True},
     )
     async def aoc_countdown(self, interaction: discord.Interaction):
         """Time until next challenge starts."""
@@ -124,10 +146,19 @@ class AdventOfCode(commands.Cog):
             )
             return
 
-        utc_minus_5 = datetime.timezone(offset=datetime.timedelta(hours=-5))
-        now = datetime.datetime.now(tz=utc_minus_5)
+        now = aoc_now()
+
+        if now.month == 11:
+            first_unlock = now.replace(month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
+            embed = info(
+                f"Day 1 unlocks in {format_timedelta(first_unlock - now)}",
+                title="Countdown",
+                member=guild.me,
+            )
+            await interaction.response.send_message(embed=embed)
+            return
 
-        if now.month != 12:
+        if now.month != 12 or now.day > last_puzzle_day(now.year):
             await interaction.response.send_message(
                 embed=failure("AoC is over!"),
                 ephemeral=True,
@@ -135,12 +166,7 @@ class AdventOfCode(commands.Cog):
             return
 
         current_day = now.day
-        end_date = datetime.datetime(
-            year=2025,
-            month=12,
-            day=current_day + 1,
-            tzinfo=utc_minus_5
-        )
+        end_date = now.replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
 
         difference = end_date - now
         ends_in = format_timedelta(difference)
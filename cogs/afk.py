@@ -1,10 +1,14 @@
 from __future__ import annotations
+import logging
 from typing import Optional
 from datetime import datetime, timedelta, timezone
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 
+# One record per message, sampled down by utils.log
+check_log = logging.getLogger("snappy.afk.checks")
+
 
 class AFK(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -16,7 +20,7 @@ class AFK(commands.Cog):
         self.cleanup_expired.cancel()
 
 
-    @app_commands.command(name="setafk", description="Set AFK status.")
+    @app_commands.command(name="setafk", description="Set AFK status.", extras={"defer_ephemeral": True})
     async def setafk(
         self,
         interaction: discord.Interaction,
@@ -64,14 +68,19 @@ class AFK(commands.Cog):
             return
 
         afk = await self.manager.get_afk(message.guild.id, message.author.id)
+        check_log.info(
+            "AFK check",
+            extra={"guild_id": message.guild.id, "user_id": message.author.id, "afk": bool(afk)},
+        )
         if afk:
             await self.manager.remove_afk(message.guild.id, message.author.id)
-            await message.channel.send(
+            self.bot.outbound.send(
+                message.channel,
                 embed=discord.Embed(
                     title="",
                     description=f"{message.author.mention} is no longer afk",
                     color=0xffb101,
-                )
+                ),
             )
 
         mentioned_users = set(message.mentions)
@@ -114,7 +123,7 @@ class AFK(commands.Cog):
             if reason:
                 embed.add_field(name="Reason", value=reason, inline=False)
 
-            await message.channel.send(embed=embed)
+            self.bot.outbound.send(message.channel, embed=embed)
 
 
     @tasks.loop(minutes=10)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import io
+import tempfile
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from utils.manager import DatabaseUnavailable
+from utils.data_transfer import read_records
+
+
+TABLE_CHOICES = [
+    app_commands.Choice(name="Points", value="points"),
+    app_commands.Choice(name="AFK statuses", value="afk"),
+]
+
+FORMAT_CHOICES = [
+    app_commands.Choice(name="CSV", value="csv"),
+    app_commands.Choice(name="JSON lines", value="jsonl"),
+]
+
+
+class DataTransfer(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    def _manager(self, table: str):
+        return self.bot.points_manager if table == "points" else self.bot.afk_manager
+
+    data_group = app_commands.Group(
+        name="data",
+        description="Export or import guild data (mods only)",
+        guild_only=True,
+        default_permissions=discord.Permissions(ban_members=True),
+    )
+
+    @data_group.command(name="export", description="Export points or AFK data of this server")
+    @app_commands.checks.has_permissions(ban_members=True)
+    @app_commands.choices(table=TABLE_CHOICES, fmt=FORMAT_CHOICES)
+    @app_commands.rename(fmt="format")
+    async def export(
+        self,
+        interaction: discord.Interaction,
+        table: app_commands.Choice[str],
+        fmt: app_commands.Choice[str] | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+        fmt_value = fmt.value if fmt else "csv"
+
+        # COPY streams into a temporary file instead of building the export in memory
+        with tempfile.TemporaryFile() as output:
+            count = await self._manager(table.value).export_rows(
+                interaction.guild.id, output, fmt=fmt_value
+            )
+            output.seek(0)
+            await interaction.followup.send(
+                f"📦 Exported **{count}** {table.name.lower()} rows.",
+                file=discord.File(output, filename=f"{table.value}-{interaction.guild.id}.{fmt_value}"),
+                ephemeral=True,
+            )
+
+    @data_group.command(name="import", description="Import points or AFK data into this server")
+    @app_commands.checks.has_permissions(ban_members=True)
+    @app_commands.choices(table=TABLE_CHOICES, fmt=FORMAT_CHOICES)
+    @app_commands.rename(fmt="format")
+    async def import_(
+        self,
+        interaction: discord.Interaction,
+        table: app_commands.Choice[str],
+        file: discord.Attachment,
+        fmt: app_commands.Choice[str] | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        stream = io.TextIOWrapper(io.BytesIO(await file.read()), encoding="utf-8", newline="")
+        records = read_records(table.value, stream, fmt.value if fmt else "csv")
+
+        try:
+            if table.value == "points":
+                count = await self.bot.points_manager.import_rows(
+                    interaction.guild.id, records, actor_id=interaction.user.id
+                )
+            else:
+                count = await self.bot.afk_manager.import_rows(interaction.guild.id, records)
+        except (KeyError, ValueError) as e:
+            await interaction.followup.send(f"❌ Invalid import file: `{e}`", ephemeral=True)
+            return
+
+        await interaction.followup.send(
+            f"✅ Imported **{count}** {table.name.lower()} rows.", ephemeral=True
+        )
+
+    @export.error
+    @import_.error
+    async def data_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        msg = "An error occurred while running this command."
+
+        if isinstance(error, app_commands.MissingPermissions):
+            msg = "You don't have permission to use this command."
+        elif isinstance(getattr(error, "original", None), DatabaseUnavailable):
+            msg = "The database is unavailable right now, try again in a few minutes."
+
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+
+        raise error
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(DataTransfer(bot))
@@ -1,20 +1,41 @@
 from __future__ import annotations
 
+import logging
+import math
 import os
 import time
-import platform
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 
-import psutil
 import discord
 from discord.ext import commands
-from aiohttp import web
 from decouple import config
 from discord import app_commands
 
 import constants
 
+log = logging.getLogger("snappy.health")
+
+# psutil, platform and aiohttp.web are imported on first use, they cost tens of
+# milliseconds of import time and nothing needs them before the bot is ready
+if TYPE_CHECKING:
+    from aiohttp import web
+
+
+def _process_stats() -> tuple[float, str]:
+    """RSS of this process in MB and the Python version."""
+    import psutil
+    import platform
+
+    mem_mb = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
+    return round(mem_mb, 2), platform.python_version()
+
+
+def _latency_ms(latency: float) -> float | None:
+    # NaN until the first heartbeat ack, which isn't valid JSON
+    return None if math.isnan(latency) else round(latency * 1000, 2)
+
 
 class HealthCheck(commands.Cog):
     """
@@ -37,13 +58,8 @@ class HealthCheck(commands.Cog):
         self.max_requests = 2
         self.client_requests: Dict[str, List[datetime]] = {}
 
-        self.app = web.Application()
-        self.app.add_routes(
-            [
-                web.get("/health", self.health),
-                web.head("/ready", self.ready),
-            ]
-        )
+        # shard_id -> whether the shard is connected and has finished its READY
+        self.shard_ready: Dict[int, bool] = {}
 
         self.runner: web.AppRunner | None = None
         self.site: web.TCPSite | None = None
@@ -76,7 +92,51 @@ class HealthCheck(commands.Cog):
         return False
 
 
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id: int):
+        self.shard_ready[shard_id] = True
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id: int):
+        self.shard_ready[shard_id] = True
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shard_ready[shard_id] = False
+
+    def _shard_stats(self) -> List[dict]:
+        guild_counts = Counter(g.shard_id for g in self.bot.guilds)
+        return [
+            {
+                "id": shard_id,
+                "latency_ms": _latency_ms(shard.latency),
+                "guilds": guild_counts.get(shard_id, 0),
+                "ready": self.shard_ready.get(shard_id, False) and not shard.is_closed(),
+            }
+            for shard_id, shard in sorted(self.bot.shards.items())
+        ]
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        from aiohttp import web
+
+        # Not rate limited, scrapers poll it every few seconds and it's only in-memory counters
+        lines = [
+            "# TYPE snappy_shard_latency_seconds gauge",
+            "# TYPE snappy_shard_guilds gauge",
+            "# TYPE snappy_shard_ready gauge",
+        ]
+        for shard in self._shard_stats():
+            label = f'{{shard="{shard["id"]}"}}'
+            if shard["latency_ms"] is not None:
+                lines.append(f"snappy_shard_latency_seconds{label} {shard['latency_ms'] / 1000}")
+            lines.append(f"snappy_shard_guilds{label} {shard['guilds']}")
+            lines.append(f"snappy_shard_ready{label} {int(shard['ready'])}")
+
+        return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
     async def health(self, request: web.Request) -> web.Response:
+        from aiohttp import web
+
         if self._is_rate_limited(request):
             return web.json_response(
                 {
@@ -86,28 +146,37 @@ class HealthCheck(commands.Cog):
                 status=429,
             )
 
-        process = psutil.Process(os.getpid())
-        mem_mb = process.memory_info().rss / 1024 / 1024
+        mem_mb, python_version = _process_stats()
 
         data = {
-            "status": "ok",
+            "status": "draining" if self.bot.lifecycle.draining else "ok",
             "build_version": self.bot.build_version,
             "uptime_seconds": int(time.time() - self.start_time),
-            "latency_ms": round(self.bot.latency * 1000, 2),
+            "latency_ms": _latency_ms(self.bot.latency),
             "guilds": len(self.bot.guilds),
             "users": sum(g.member_count or 0 for g in self.bot.guilds),
-            "python_version": platform.python_version(),
+            "shard_count": self.bot.shard_count,
+            "shards": self._shard_stats(),
+            "python_version": python_version,
             "discord_py_version": discord.__version__,
-            "memory_mb": round(mem_mb, 2),
+            "memory_mb": mem_mb,
             "pid": os.getpid(),
         }
 
+        for name, provider in self.bot.health_metrics.items():
+            data[name] = provider()
+
         return web.json_response(data)
 
     async def ready(self, request: web.Request) -> web.Response:
+        from aiohttp import web
+
         if self._is_rate_limited(request):
             return web.Response(text="RATE LIMITED", status=429)
 
+        if self.bot.lifecycle.draining:
+            return web.Response(text="DRAINING", status=503)
+
         if self.bot.is_ready():
             return web.Response(text="READY", status=200)
 
@@ -117,13 +186,24 @@ class HealthCheck(commands.Cog):
     async def _start_server(self):
         await self.bot.wait_until_ready()
 
-        self.runner = web.AppRunner(self.app)
+        from aiohttp import web
+
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/health", self.health),
+                web.head("/ready", self.ready),
+                web.get("/metrics", self.metrics),
+            ]
+        )
+
+        self.runner = web.AppRunner(app)
         await self.runner.setup()
 
         self.site = web.TCPSite(self.runner, self.host, self.port)
         await self.site.start()
 
-        print(f"🫀Health checks available at http://{self.host}:{self.port}")
+        log.info("Health checks available at http://%s:%s", self.host, self.port)
 
     async def cog_unload(self):
         if self.site:
@@ -137,8 +217,7 @@ class HealthCheck(commands.Cog):
         description="Show bot health, status, and system statistics"
     )
     async def health_command(self, interaction: discord.Interaction):
-        process = psutil.Process(os.getpid())
-        mem_mb = process.memory_info().rss / 1024 / 1024
+        mem_mb, python_version = _process_stats()
         uptime = int(time.time() - self.start_time)
 
         embed = discord.Embed(
@@ -153,14 +232,19 @@ class HealthCheck(commands.Cog):
 
         embed.add_field(name="Uptime", value=f"{uptime} seconds", inline=True)
         embed.add_field(name="Guilds", value=str(len(self.bot.guilds)), inline=True)
+        embed.add_field(
+            name="Shards",
+            value=f"{sum(shard['ready'] for shard in self._shard_stats())}/{len(self.bot.shards)} ready",
+            inline=True,
+        )
         embed.add_field(
             name="Users",
             value=str(sum(g.member_count or 0 for g in self.bot.guilds)),
             inline=True,
         )
 
-        embed.add_field(name="Memory", value=f"{round(mem_mb, 2)} MB", inline=True)
-        embed.add_field(name="Python", value=platform.python_version(), inline=True)
+        embed.add_field(name="Memory", value=f"{mem_mb} MB", inline=True)
+        embed.add_field(name="Python", value=python_version, inline=True)
         embed.add_field(name="discord.py", value=discord.__version__, inline=True)
 
         embed.add_field(
@@ -173,6 +257,39 @@ class HealthCheck(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=False)
 
+    @app_commands.command(
+        name="command_stats",
+        description="Show per-command latency percentiles (mods only)",
+        extras={"defer_ephemeral": True},
+    )
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def command_stats(self, interaction: discord.Interaction):
+        stats = self.bot.tracer.stats()
+
+        embed = discord.Embed(
+            title="⏱️ Command latency",
+            color=discord.Color.blurple(),
+            timestamp=datetime.utcnow()
+        )
+
+        for name, data in sorted(stats.items(), key=lambda item: item[1]["p95_ms"], reverse=True)[:25]:
+            spans = ", ".join(f"{kind} {ms} ms" for kind, ms in data["avg_span_ms"].items()) or "none"
+            embed.add_field(
+                name=f"/{name} ({data['count']} runs, {data['errors']} errors)",
+                value=(
+                    f"p50 {data['p50_ms']} ms · p95 {data['p95_ms']} ms · p99 {data['p99_ms']} ms\n"
+                    f"ack p95 {data['ack_p95_ms']} ms · slow acks {data['slow_acks']} · "
+                    f"auto-deferred {data['auto_defers']}\n"
+                    f"avg spans: {spans}"
+                ),
+                inline=False,
+            )
+
+        if not stats:
+            embed.description = "No commands traced yet."
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @health_command.error
     async def health_error(self, interaction: discord.Interaction, error):
         if isinstance(error, app_commands.CommandOnCooldown):
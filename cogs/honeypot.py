@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import asyncio
+from collections import defaultdict
+
+import discord
+from discord.ext import commands
+
+log = logging.getLogger("snappy.honeypot")
+
+
+class Honeypot(commands.Cog):
+    """
+    Bans accounts that post in the bait channel and purges their recent messages.
+
+    The dispatch path only does a cached settings lookup on the channel ID and a queue put.
+    A single worker drains the queue, grouping raid bursts into bulk bans of up to
+    200 users per guild. discord.py waits out short rate limits inside the request, longer
+    ones (above the bot's max_ratelimit_timeout) raise RateLimited and are slept out here.
+    """
+
+    # How far back the ban deletes messages, across all channels
+    DELETE_MESSAGE_SECONDS = 60 * 60 * 24
+    BULK_BAN_LIMIT = 200
+    # Give a raid burst this long to accumulate before banning
+    BATCH_WINDOW_SECONDS = 1
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.settings = bot.settings_manager
+        self.queue: asyncio.Queue[discord.Member] = asyncio.Queue(maxsize=5000)
+        # (guild_id, user_id) currently queued, so repeated bait posts queue one ban
+        self._queued: set[tuple[int, int]] = set()
+        self._worker: asyncio.Task | None = None
+
+        self.banned = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.bulk_ban_forbidden = 0
+        self.bot.health_metrics["honeypot"] = self.stats
+
+    async def cog_load(self):
+        self._worker = asyncio.create_task(self._ban_worker())
+
+    async def cog_unload(self):
+        if self._worker:
+            self._worker.cancel()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.channel.id != self.settings.get(message.guild.id, "bait_channel_id"):
+            return
+
+        author = message.author
+        if author.bot or not isinstance(author, discord.Member) or author.guild_permissions.manage_messages:
+            return
+
+        key = (message.guild.id, author.id)
+        if key in self._queued:
+            return
+
+        try:
+            self.queue.put_nowait(author)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self._queued.add(key)
+
+    def _suppress_cached_messages(self, guild_id: int, user_ids: set[int]):
+        """Marks cached messages about to be purged so delete-log listeners skip them."""
+        for cached in self.bot.cached_messages:
+            if cached.guild and cached.guild.id == guild_id and cached.author.id in user_ids:
+                self.bot.suppressed_deletes.add(cached.id)
+
+    async def _take_batch(self) -> list[discord.Member]:
+        batch = [await self.queue.get()]
+        await asyncio.sleep(self.BATCH_WINDOW_SECONDS)
+        while len(batch) < self.BULK_BAN_LIMIT and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _ban(self, guild: discord.Guild, members: list[discord.Member]) -> list[int]:
+        reason = "Honeypot: posted in the bait channel"
+        while True:
+            try:
+                if len(members) == 1:
+                    await guild.ban(
+                        members[0], reason=reason, delete_message_seconds=self.DELETE_MESSAGE_SECONDS
+                    )
+                    return [members[0].id]
+
+                try:
+                    result = await guild.bulk_ban(
+                        members, reason=reason, delete_message_seconds=self.DELETE_MESSAGE_SECONDS
+                    )
+                except discord.Forbidden:
+                    # Bulk ban also needs Manage Server, plain bans only need Ban Members
+                    self.bulk_ban_forbidden += 1
+                    return await self._ban_each(guild, members)
+                return [user.id for user in result.banned]
+            except discord.RateLimited as e:
+                self.rate_limited += 1
+                await asyncio.sleep(e.retry_after)
+
+    async def _ban_each(self, guild: discord.Guild, members: list[discord.Member]) -> list[int]:
+        banned = []
+        for member in members:
+            try:
+                banned.extend(await self._ban(guild, [member]))
+            except discord.HTTPException as e:
+                log.warning("Honeypot ban failed: %r", e, extra={"guild_id": guild.id, "user_id": member.id})
+        return banned
+
+    async def _ban_worker(self):
+        while True:
+            batch = await self._take_batch()
+
+            by_guild: dict[discord.Guild, list[discord.Member]] = defaultdict(list)
+            for member in batch:
+                by_guild[member.guild].append(member)
+
+            for guild, members in by_guild.items():
+                user_ids = {member.id for member in members}
+                self._suppress_cached_messages(guild.id, user_ids)
+
+                try:
+                    banned = await self._ban(guild, members)
+                except discord.HTTPException as e:
+                    log.warning("Honeypot ban failed: %r", e, extra={"guild_id": guild.id})
+                    banned = []
+                except Exception:
+                    # Anything else would end the worker and leave the queue unattended
+                    log.exception("Honeypot ban failed", extra={"guild_id": guild.id})
+                    banned = []
+                finally:
+                    for member in members:
+                        self._queued.discard((guild.id, member.id))
+
+                self.banned += len(banned)
+                self.failed += len(members) - len(banned)
+                if banned:
+                    self._log_bans(guild, banned)
+
+    def _log_bans(self, guild: discord.Guild, user_ids: list[int]):
+        channel = guild.get_channel(self.settings.get(guild.id, "deterrence_log_channel_id"))
+        if channel is None:
+            return
+
+        mentions = ", ".join(f"<@{user_id}>" for user_id in user_ids[:50])
+        if len(user_ids) > 50:
+            mentions += f" and {len(user_ids) - 50} more"
+
+        self.bot.outbound.send(
+            channel,
+            embed=discord.Embed(
+                title="🍯 Honeypot",
+                description=f"Banned {len(user_ids)} account(s) for posting in the bait channel: {mentions}",
+                color=discord.Color.red(),
+            ),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "banned": self.banned,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "bulk_ban_forbidden": self.bulk_ban_forbidden,
+            "suppressed_deletes": len(self.bot.suppressed_deletes),
+        }
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Honeypot(bot))
@@ -2,15 +2,117 @@ from __future__ import annotations
 from typing import Optional
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from constants import challenges_channel_id
+from constants import challenge_award_rules
+from utils.embed_handler import register_static, static_embed
+from utils.outbound import Priority
+from utils.points_rules import PointsRulesEngine
+from utils.manager import DatabaseUnavailable
+
+
+def format_total(total: int | None) -> str:
+    # None means the change was journaled while the database is down and the total isn't known
+    return f"**{total}** points." if total is not None else "pending, applied once the database is back."
+
+
+class PointsHistoryView(discord.ui.View):
+    """Pages through a member's points ledger with a keyset cursor."""
+
+    PAGE_SIZE = 10
+
+    def __init__(self, bot: commands.Bot, guild: discord.Guild, member: discord.abc.User):
+        super().__init__(timeout=180)
+        self.bot = bot
+        self.guild = guild
+        self.member = member
+        self.cursor = None
+
+    async def build_page(self) -> discord.Embed | None:
+        rows = await self.bot.points_manager.get_history(
+            self.guild.id, self.member.id, limit=self.PAGE_SIZE, before=self.cursor
+        )
+        if not rows:
+            return None
+
+        self.cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        self.older.disabled = len(rows) < self.PAGE_SIZE
+
+        actor_ids = {r["actor_id"] for r in rows if r["actor_id"] is not None}
+        names = await self.bot.display_names.resolve(self.guild, actor_ids)
+
+        lines = []
+        for row in rows:
+            actor = names.get(row["actor_id"]) or (f"<@{row['actor_id']}>" if row["actor_id"] else "system")
+            line = f"{discord.utils.format_dt(row['created_at'], 'd')} **{row['delta']:+}** by {actor}"
+            if row["reason"]:
+                line += f" — {row['reason']}"
+            lines.append(line)
+
+        return discord.Embed(
+            title="📜 Points history",
+            description=f"{self.member.mention}\n\n" + "\n".join(lines),
+            color=discord.Color.blurple(),
+        )
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = await self.build_page()
+        if embed is None:
+            button.disabled = True
+            await interaction.response.edit_message(view=self)
+            return
+
+        await interaction.response.edit_message(embed=embed, view=self)
 
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.manager = bot.points_manager
+        self.rules_engine = PointsRulesEngine(
+            self.manager,
+            challenge_award_rules,
+            channel_ids=lambda guild_id: bot.settings_manager.get_set(
+                guild_id, "code_submissions_channel_id", "challenges_channel_id"
+            ),
+        )
+        self.bot.health_metrics["challenge_awards"] = self.rules_engine.stats
+
+    async def cog_load(self):
+        register_static("challenge_rules", self.build_challenge_embed)
+        self.flush_awards.start()
+
+    async def cog_unload(self):
+        self.flush_awards.cancel()
+        await self.rules_engine.flush()
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        self.rules_engine.handle_reaction(payload)
+
+    @tasks.loop(seconds=2)
+    async def flush_awards(self):
+        # flush() never raises, failing awards are dropped inside the engine
+        for award, new_total in await self.rules_engine.flush():
+            guild = self.bot.get_guild(award.guild_id)
+            if guild is None:
+                continue
+
+            member = await self.bot.member_cache.get_or_fetch(guild, award.user_id)
+            if member is None:
+                continue
+
+            embed = discord.Embed(
+                title="Congratulations 🌟",
+                description=(
+                    f"You were awarded **{award.points}** points ({award.rule} solution).\n"
+                    f"New total: **{new_total}** points."
+                ),
+                color=discord.Color.green(),
+            )
+            embed.set_footer(text=f"Tortoise Community")
+            self.bot.outbound.send(member, priority=Priority.DM, embed=embed)
 
     @staticmethod
     def build_challenge_embed():
@@ -54,7 +156,7 @@ class Leaderboard(commands.Cog):
 
     @app_commands.command(name="challenge_rules", description="Show challenge guidelines")
     async def rules(self, interaction: discord.Interaction):
-        await interaction.response.send_message(embed=self.build_challenge_embed())
+        await interaction.response.send_message(embed=static_embed("challenge_rules"))
 
 
     @app_commands.command(name="rmpoints", description="Remove points from a user (mods only).")
@@ -74,14 +176,14 @@ class Leaderboard(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         new_total = await self.manager.remove_points(
-            interaction.guild.id, member.id, amount
+            interaction.guild.id, member.id, amount, actor_id=interaction.user.id
         )
 
         embed = discord.Embed(
             title="Points Removed ❎",
             description=(
                 f"**{amount}** points removed from {member.mention}\n"
-                f"New total: **{new_total}** points."
+                f"New total: {format_total(new_total)}"
             ),
             color=discord.Color.red(),
         )
@@ -108,17 +210,17 @@ class Leaderboard(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         new_total = await self.manager.add_points(
-            interaction.guild.id, member.id, amount
+            interaction.guild.id, member.id, amount, actor_id=interaction.user.id, reason=reason
         )
 
         desc = (
             f"{member.mention} received **{amount}** points.\n"
-            f"New total: **{new_total}** points."
+            f"New total: {format_total(new_total)}"
         )
 
         dm_desc = (
             f"You were awarded **{amount}** points.\n"
-            f"New total: **{new_total}** points."
+            f"New total: {format_total(new_total)}"
         )
 
         if reason:
@@ -138,18 +240,29 @@ class Leaderboard(commands.Cog):
                 color=discord.Color.green(),
             )
             embed.set_footer(text=f"Tortoise Community")
-            try:
-                await member.send(
-                    embed=embed,
-                )
-            except discord.Forbidden:
-                pass
+            # Queued at DM priority, a closed DM (Forbidden) is dropped by the queue
+            self.bot.outbound.send(member, priority=Priority.DM, embed=embed)
 
         await interaction.followup.send(embed=embed)
 
 
+    @app_commands.command(name="rebuild_points", description="Recompute point totals from the ledger (admins only).")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def rebuild_points(self, interaction: discord.Interaction):
+        if interaction.guild is None:
+            await interaction.response.send_message(
+                "This command can only be used in a server.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        rebuilt = await self.manager.rebuild_totals(interaction.guild.id)
+        await interaction.followup.send(f"Rebuilt **{rebuilt}** totals from the ledger.", ephemeral=True)
+
+
     @addpoints.error
     @rmpoints.error
+    @rebuild_points.error
     async def mod_points_error(
         self,
         interaction: discord.Interaction,
@@ -159,6 +272,8 @@ class Leaderboard(commands.Cog):
 
         if isinstance(error, app_commands.MissingPermissions):
             msg = "You don't have permission to use this command."
+        elif isinstance(getattr(error, "original", None), DatabaseUnavailable):
+            msg = "The database is unavailable right now, try again in a few minutes."
 
         if interaction.response.is_done():
             await interaction.followup.send(msg, ephemeral=True)
@@ -168,8 +283,41 @@ class Leaderboard(commands.Cog):
         raise error
 
 
+    @app_commands.command(name="points_history", description="Show the points history of a user.")
+    async def points_history(
+        self,
+        interaction: discord.Interaction,
+        member: Optional[discord.Member] = None,
+    ):
+        if interaction.guild is None:
+            await interaction.response.send_message(
+                "This command can only be used in a server.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        view = PointsHistoryView(self.bot, interaction.guild, member or interaction.user)
+        embed = await view.build_page()
+        if embed is None:
+            await interaction.followup.send("No points history yet.", ephemeral=True)
+            return
+
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+
+
     @app_commands.command(name="leaderboard", description="Show the points leaderboard.")
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(period="Standings for the current week, month or season instead of all-time")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="This week", value="week"),
+        app_commands.Choice(name="This month", value="month"),
+        app_commands.Choice(name="This season", value="season"),
+    ])
+    async def leaderboard(
+        self,
+        interaction: discord.Interaction,
+        period: Optional[app_commands.Choice[str]] = None,
+    ):
         if interaction.guild is None:
             await interaction.response.send_message(
                 "This command can only be used in a server.", ephemeral=True
@@ -179,7 +327,7 @@ class Leaderboard(commands.Cog):
         await interaction.response.defer()
 
         entries = await self.manager.get_leaderboard(
-            interaction.guild.id, min_points=1, limit=10
+            interaction.guild.id, min_points=1, limit=10, period=period.value if period else None
         )
 
         if not entries:
@@ -189,15 +337,17 @@ class Leaderboard(commands.Cog):
             return
 
         embed = discord.Embed(
-            title=f"🏆 {interaction.guild.name} Leaderboard",
+            title=f"🏆 {interaction.guild.name} Leaderboard" + (f" · {period.name}" if period else ""),
             color=discord.Color.gold(),
         )
 
         medals = ["🥇", "🥈", "🥉"]
+        names = await self.bot.display_names.resolve(
+            interaction.guild, [user_id for user_id, _ in entries]
+        )
 
         for idx, (user_id, points) in enumerate(entries, start=1):
-            member = interaction.guild.get_member(user_id)
-            name = member.mention if member else f"<@{user_id}>"
+            name = names.get(user_id) or f"<@{user_id}>"
             rank = medals[idx - 1] if idx <= 3 else f"#{idx}"
             embed.add_field(
                 name=f"**{points}** points",
@@ -208,7 +358,7 @@ class Leaderboard(commands.Cog):
         await interaction.followup.send(embed=embed)
 
 
-    @app_commands.command(name="points", description="Check points.")
+    @app_commands.command(name="points", description="Check points.", extras={"defer_ephemeral": True})
     async def points(
         self,
         interaction: discord.Interaction,
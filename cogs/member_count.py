@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+import logging
+import asyncio
+
+import discord
+from discord.ext import commands
+
+log = logging.getLogger("snappy.member_count")
+
+
+class MemberCount(commands.Cog):
+    """
+    Keeps the member count channel's name up to date.
+
+    Discord allows two channel renames per 10 minutes, so joins and leaves only record
+    the new count and schedule a rename per guild. Events arriving while one is already
+    scheduled are coalesced into it, and the rename uses whatever count is latest by then.
+    The count is guild.member_count, which discord.py adjusts on every join and leave
+    (cached member or not), so the guild is never re-counted.
+    """
+
+    RENAME_WINDOW_SECONDS = 5 * 60
+    NAME_TEMPLATE = "👥 Members: {count:,}"
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.settings = bot.settings_manager
+        # guild_id -> latest count not yet pushed
+        self._pending: dict[int, int] = {}
+        # guild_id -> monotonic time of the last rename
+        self._last_rename: dict[int, float] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+
+        self.renamed = 0
+        self.coalesced = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bot.health_metrics["member_count"] = self.stats
+
+    async def cog_unload(self):
+        # Cleared first so cancelled flushes don't reschedule themselves
+        self._pending.clear()
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self._schedule(guild)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self._schedule(member.guild)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # on_member_remove only fires for cached members, which the lazy policy mostly hasn't
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is not None:
+            self._schedule(guild)
+
+    def _schedule(self, guild: discord.Guild):
+        if guild.member_count is None:
+            return
+
+        self._pending[guild.id] = guild.member_count
+        if guild.id in self._tasks:
+            self.coalesced += 1
+            return
+
+        self._tasks[guild.id] = asyncio.create_task(self._flush(guild))
+
+    async def _flush(self, guild: discord.Guild):
+        try:
+            last = self._last_rename.get(guild.id)
+            if last is not None:
+                await asyncio.sleep(max(0.0, last + self.RENAME_WINDOW_SECONDS - time.monotonic()))
+
+            count = self._pending.pop(guild.id, None)
+            channel = guild.get_channel(self.settings.get(guild.id, "member_count_channel_id"))
+            if count is None or channel is None:
+                return
+
+            name = self.NAME_TEMPLATE.format(count=count)
+            if channel.name == name:
+                self.skipped += 1
+                return
+
+            self._last_rename[guild.id] = time.monotonic()
+            try:
+                await channel.edit(name=name, reason="Member count update")
+                self.renamed += 1
+            except discord.HTTPException as e:
+                self.failed += 1
+                log.warning("Member count rename failed: %r", e, extra={"guild_id": guild.id})
+        finally:
+            self._tasks.pop(guild.id, None)
+            # Events that came in during the rename itself get their own window
+            if guild.id in self._pending:
+                self._schedule(guild)
+
+    def stats(self) -> dict:
+        return {
+            "renamed": self.renamed,
+            "coalesced": self.coalesced,
+            "skipped_unchanged": self.skipped,
+            "failed": self.failed,
+            "scheduled": len(self._tasks),
+        }
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MemberCount(bot))
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import time
+import logging
+import asyncio
+from collections import deque
+
+import discord
+from discord.ext import commands
+
+from utils.raid import RaidDetector
+
+log = logging.getLogger("snappy.onboarding")
+
+
+class Onboarding(commands.Cog):
+    """
+    Gives new members the new member role and welcomes them.
+
+    The join handler only feeds the raid detector, queues the role assignment and adds
+    the member to the guild's welcome batch. A few workers drain the bounded role queue,
+    discord.py waits out the rate limits, so a raid grows the backlog instead of failing.
+    Welcomes go out as one message per guild per window. While a guild is being raided
+    welcomes are paused, roles are still given.
+    """
+
+    ROLE_WORKERS = 2
+    ROLE_QUEUE_SIZE = 5000
+    WELCOME_WINDOW_SECONDS = 30
+    # Mentioned by name in one welcome, the rest are counted
+    WELCOME_MENTION_LIMIT = 20
+    # Role assignment latencies kept for the health percentiles
+    LATENCY_SAMPLES = 1000
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.settings = bot.settings_manager
+        self.raids = RaidDetector(threshold=10, window=10, cooldown=120)
+        self.queue: asyncio.Queue[tuple[discord.Member, discord.Role, float]] = asyncio.Queue(
+            maxsize=self.ROLE_QUEUE_SIZE
+        )
+        # guild_id -> IDs of members waiting to be welcomed
+        self._welcomes: dict[int, list[int]] = {}
+        self._latencies: deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._tasks: list[asyncio.Task] = []
+        # Guilds already warned about a missing new member role
+        self._missing_role_guilds: set[int] = set()
+
+        self.assigned = 0
+        self.failed = 0
+        self.dropped = 0
+        self.skipped_no_role = 0
+        self.welcomed = 0
+        self.welcome_messages = 0
+        self.welcomes_suppressed = 0
+        self.bot.health_metrics["onboarding"] = self.stats
+
+    async def cog_load(self):
+        self._tasks = [asyncio.create_task(self._role_worker()) for _ in range(self.ROLE_WORKERS)]
+        self._tasks.append(asyncio.create_task(self._welcome_loop()))
+
+    async def cog_unload(self):
+        for task in self._tasks:
+            task.cancel()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if member.bot:
+            return
+
+        guild_id = member.guild.id
+        if self.raids.record_join(guild_id):
+            self._on_raid_start(member.guild)
+
+        role = self._new_member_role(member.guild)
+        if role is None:
+            self.skipped_no_role += 1
+        else:
+            try:
+                self.queue.put_nowait((member, role, time.monotonic()))
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+        if self.raids.in_raid(guild_id):
+            self.welcomes_suppressed += 1
+        else:
+            self._welcomes.setdefault(guild_id, []).append(member.id)
+
+    def _on_raid_start(self, guild: discord.Guild):
+        # Whoever joined in the burst so far isn't welcomed either
+        self.welcomes_suppressed += len(self._welcomes.pop(guild.id, ()))
+        log.warning("Join raid detected, pausing welcomes", extra={"guild_id": guild.id})
+
+        channel = guild.get_channel(self.settings.get(guild.id, "deterrence_log_channel_id"))
+        if channel is None:
+            return
+
+        self.bot.outbound.send(
+            channel,
+            embed=discord.Embed(
+                title="🚨 Join raid",
+                description=(
+                    f"{self.raids.threshold} or more joins within {self.raids.window} seconds, "
+                    "welcome messages are paused until it calms down."
+                ),
+                color=discord.Color.red(),
+            ),
+        )
+
+    def _new_member_role(self, guild: discord.Guild) -> discord.Role | None:
+        # Without an override a guild gets the home guild's role ID, which doesn't exist there
+        role = guild.get_role(self.settings.get(guild.id, "new_member_role"))
+        if role is None:
+            if guild.id not in self._missing_role_guilds:
+                self._missing_role_guilds.add(guild.id)
+                log.warning("No new member role configured, skipping role assignment", extra={"guild_id": guild.id})
+        else:
+            self._missing_role_guilds.discard(guild.id)
+        return role
+
+    async def _role_worker(self):
+        while True:
+            member, role, enqueued_at = await self.queue.get()
+
+            try:
+                await member.add_roles(role, reason="New member")
+                self.assigned += 1
+            except discord.NotFound:
+                # The member left before their turn
+                self.failed += 1
+            except Exception as e:
+                # Anything else must not end the worker
+                self.failed += 1
+                log.warning("New member role failed: %r", e, extra={"guild_id": member.guild.id})
+            finally:
+                self._latencies.append(time.monotonic() - enqueued_at)
+
+    async def _welcome_loop(self):
+        while True:
+            await asyncio.sleep(self.WELCOME_WINDOW_SECONDS)
+            for guild_id in list(self._welcomes):
+                member_ids = self._welcomes.pop(guild_id)
+                if self.raids.in_raid(guild_id):
+                    self.welcomes_suppressed += len(member_ids)
+                    continue
+                self._send_welcome(guild_id, member_ids)
+
+    def _send_welcome(self, guild_id: int, member_ids: list[int]):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild and guild.get_channel(self.settings.get(guild_id, "welcome_channel_id"))
+        if channel is None:
+            return
+
+        mentions = ", ".join(f"<@{member_id}>" for member_id in member_ids[: self.WELCOME_MENTION_LIMIT])
+        if len(member_ids) > self.WELCOME_MENTION_LIMIT:
+            mentions += f" and {len(member_ids) - self.WELCOME_MENTION_LIMIT} others"
+
+        self.bot.outbound.send(channel, content=f"👋 Welcome {mentions}!")
+        self.welcomed += len(member_ids)
+        self.welcome_messages += 1
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "role_backlog": self.queue.qsize(),
+            "roles_assigned": self.assigned,
+            "roles_failed": self.failed,
+            "roles_dropped": self.dropped,
+            "roles_skipped_no_role": self.skipped_no_role,
+            "role_latency_ms": {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+                "max": round(latencies[-1] * 1000, 1) if latencies else None,
+            },
+            "welcome_pending": sum(len(member_ids) for member_ids in self._welcomes.values()),
+            "welcomed": self.welcomed,
+            "welcome_messages": self.welcome_messages,
+            "welcomes_suppressed": self.welcomes_suppressed,
+            **self.raids.stats(),
+        }
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Onboarding(bot))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from constants import RULES
+from utils.embed_handler import info
+from utils.rule_index import rule_index
+
+
+class Rules(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="rule", description="Show a server rule.", extras={"defer_ephemeral": True})
+    @app_commands.describe(rule="Rule number, title or keyword", member="Member to point the rule at")
+    async def rule(
+        self,
+        interaction: discord.Interaction,
+        rule: str,
+        member: Optional[discord.Member] = None,
+    ):
+        number = rule_index.resolve(rule)
+        if number is None:
+            await interaction.response.send_message(f"❌ No rule matches `{rule}`.", ephemeral=True)
+            return
+
+        # Colored like the bot's own messages, the invoker's roles have nothing to do with the rule
+        bot_member = interaction.guild.me if interaction.guild else interaction.client.user
+        embed = info(RULES[number]["text"], bot_member, title=f"Rule {number}: {RULES[number]['title']}")
+        await interaction.response.send_message(content=member.mention if member else None, embed=embed)
+
+    @rule.autocomplete("rule")
+    async def rule_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=f"{number}. {RULES[number]['title']}", value=str(number))
+            for number in rule_index.search(current)
+        ]
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Rules(bot))
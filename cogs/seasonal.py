@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+import datetime
+from typing import Callable, Dict
+
+from discord.ext import commands, tasks
+
+from utils.aoc_season import aoc_now, is_aoc_season
+
+log = logging.getLogger("snappy.seasonal")
+
+
+# extension -> predicate telling whether it should be loaded at the given time
+SEASONAL_EXTENSIONS: Dict[str, Callable[[datetime.datetime], bool]] = {
+    "cogs.advent_of_code": is_aoc_season,
+}
+
+
+class Seasonal(commands.Cog):
+    """
+    Loads extensions only while their season is on, so their polling loops, caches and
+    slash commands don't exist for the rest of the year. Checked hourly, the application
+    commands are re-synced whenever the loaded set changes.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        # Applied before the startup command sync so seasonal commands are part of it
+        await self._apply()
+        self.check_seasons.start()
+
+    async def cog_unload(self):
+        self.check_seasons.cancel()
+
+    async def _apply(self) -> bool:
+        """Loads or unloads seasonal extensions, returns whether anything changed."""
+        now = aoc_now()
+        changed = False
+
+        for extension, in_season in SEASONAL_EXTENSIONS.items():
+            loaded = extension in self.bot.extensions
+            try:
+                if in_season(now) and not loaded:
+                    await self.bot.load_extension(extension)
+                    log.info("Loaded seasonal extension %s", extension)
+                    changed = True
+                elif not in_season(now) and loaded:
+                    await self.bot.unload_extension(extension)
+                    log.info("Unloaded seasonal extension %s", extension)
+                    changed = True
+            except commands.ExtensionError as e:
+                log.warning("Seasonal extension %s failed: %r", extension, e)
+
+        return changed
+
+    @tasks.loop(hours=1)
+    async def check_seasons(self):
+        if await self._apply() and self.bot.is_primary:
+            await self.bot.tree.sync()
+            log.info("Synced application commands")
+
+    @check_seasons.before_loop
+    async def before_check_seasons(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Seasonal(bot))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from utils.manager import SETTING_KEYS, DatabaseUnavailable
+
+CHANNEL_KEYS = tuple(key for key in SETTING_KEYS if key.endswith("_channel_id"))
+# Every other channel setting is posted to, the member count one is only renamed
+VOICE_CHANNEL_KEYS = ("member_count_channel_id",)
+ROLE_KEYS = tuple(key for key in SETTING_KEYS if key not in CHANNEL_KEYS)
+
+
+def _choices(keys: tuple[str, ...], current: str) -> list[app_commands.Choice[str]]:
+    current = current.lower()
+    return [app_commands.Choice(name=key, value=key) for key in keys if current in key][:25]
+
+
+class Settings(commands.Cog):
+    """Per-guild channel and role overrides, anything not set uses the defaults from constants."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.manager = bot.settings_manager
+
+    settings_group = app_commands.Group(
+        name="settings",
+        description="Configure the channels and roles the bot uses (admins only)",
+        guild_only=True,
+        default_permissions=discord.Permissions(administrator=True),
+    )
+
+    @settings_group.command(
+        name="show",
+        description="Show the settings overridden in this server",
+        extras={"defer_ephemeral": True},
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def show(self, interaction: discord.Interaction):
+        overrides = self.manager.overrides(interaction.guild.id)
+        if not overrides:
+            await interaction.response.send_message("All settings use their defaults.", ephemeral=True)
+            return
+
+        lines = []
+        for key, value in sorted(overrides.items()):
+            mention = f"<#{value}>" if key in CHANNEL_KEYS else f"<@&{value}>"
+            lines.append(f"`{key}` → {mention}")
+        await interaction.response.send_message(
+            embed=discord.Embed(title="⚙️ Settings", description="\n".join(lines), color=discord.Color.blurple()),
+            ephemeral=True,
+        )
+
+    @settings_group.command(
+        name="channel",
+        description="Set the channel used for a setting",
+        extras={"defer_ephemeral": True},
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def set_channel(
+        self,
+        interaction: discord.Interaction,
+        key: str,
+        channel: discord.TextChannel | discord.VoiceChannel,
+    ):
+        if key not in CHANNEL_KEYS:
+            await interaction.response.send_message(f"❌ `{key}` is not a channel setting.", ephemeral=True)
+            return
+        if isinstance(channel, discord.VoiceChannel) and key not in VOICE_CHANNEL_KEYS:
+            await interaction.response.send_message(f"❌ `{key}` needs a text channel.", ephemeral=True)
+            return
+
+        await self.manager.set(interaction.guild.id, key, channel.id)
+        await interaction.response.send_message(f"✅ `{key}` set to {channel.mention}.", ephemeral=True)
+
+    @settings_group.command(
+        name="role",
+        description="Set the role used for a setting",
+        extras={"defer_ephemeral": True},
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def set_role(self, interaction: discord.Interaction, key: str, role: discord.Role):
+        if key not in ROLE_KEYS:
+            await interaction.response.send_message(f"❌ `{key}` is not a role setting.", ephemeral=True)
+            return
+
+        await self.manager.set(interaction.guild.id, key, role.id)
+        await interaction.response.send_message(f"✅ `{key}` set to {role.mention}.", ephemeral=True)
+
+    @settings_group.command(
+        name="reset",
+        description="Reset a setting to its default",
+        extras={"defer_ephemeral": True},
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reset(self, interaction: discord.Interaction, key: str):
+        if key not in SETTING_KEYS:
+            await interaction.response.send_message(f"❌ Unknown setting `{key}`.", ephemeral=True)
+            return
+
+        await self.manager.reset(interaction.guild.id, key)
+        await interaction.response.send_message(f"✅ `{key}` reset to its default.", ephemeral=True)
+
+    @set_channel.error
+    @set_role.error
+    @reset.error
+    async def settings_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        msg = "An error occurred while running this command."
+
+        if isinstance(error, app_commands.MissingPermissions):
+            msg = "You don't have permission to use this command."
+        elif isinstance(getattr(error, "original", None), DatabaseUnavailable):
+            msg = "The database is unavailable right now, try again in a few minutes."
+
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+
+        raise error
+
+    @set_channel.autocomplete("key")
+    async def channel_key_autocomplete(self, interaction: discord.Interaction, current: str):
+        return _choices(CHANNEL_KEYS, current)
+
+    @set_role.autocomplete("key")
+    async def role_key_autocomplete(self, interaction: discord.Interaction, current: str):
+        return _choices(ROLE_KEYS, current)
+
+    @reset.autocomplete("key")
+    async def reset_key_autocomplete(self, interaction: discord.Interaction, current: str):
+        return _choices(SETTING_KEYS, current)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Settings(bot))
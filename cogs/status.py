@@ -1,25 +1,89 @@
-import itertools
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 
 
+class StatusRotation:
+    """
+    Ring buffer of statuses with O(1) add, remove and next.
+
+    Removal swaps the last status into the freed slot, so the rotation
+    position survives edits instead of restarting from the first status.
+    """
+
+    def __init__(self, statuses=()):
+        self._items: list[str] = []
+        self._index: dict[str, int] = {}
+        self._position = 0
+
+        for status in statuses:
+            self.add(status)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, status: str) -> bool:
+        return status in self._index
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, status: str) -> bool:
+        if status in self._index:
+            return False
+
+        self._index[status] = len(self._items)
+        self._items.append(status)
+        return True
+
+    def remove(self, status: str) -> bool:
+        idx = self._index.pop(status, None)
+        if idx is None:
+            return False
+
+        last = self._items.pop()
+        if idx < len(self._items):
+            self._items[idx] = last
+            self._index[last] = idx
+
+        if self._position >= len(self._items):
+            self._position = 0
+        return True
+
+    def next(self) -> str:
+        status = self._items[self._position]
+        self._position = (self._position + 1) % len(self._items)
+        return status
+
+
 class StatusCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.manager = bot.status_manager
 
-        self.statuses = [
-            "watching Tortoise Community",
-            "solving Leetcode problems 👨‍💻",
-        ]
-
-        self.status_cycle = itertools.cycle(self.statuses)
+        self.statuses = StatusRotation()
+        self.current_status: str | None = None
 
     async def cog_load(self):
+        # Defaults are seeded by the manager when the table is created
+        self.statuses = StatusRotation(await self.manager.get_statuses())
+        self.bot.db.bus.subscribe("bot_statuses", self._on_statuses_changed, resync=self._reload_statuses)
         self.change_status.start()
 
+    async def _on_statuses_changed(self, guild_id, user_id):
+        await self._reload_statuses()
+
+    async def _reload_statuses(self):
+        """Applies edits made by other instances without restarting the rotation."""
+        statuses = await self.manager.get_statuses()
+        for status in set(self.statuses) - set(statuses):
+            self.statuses.remove(status)
+        for status in statuses:
+            self.statuses.add(status)
+
     async def cog_unload(self):
         self.change_status.cancel()
+        self.bot.db.bus.unsubscribe("bot_statuses", self._on_statuses_changed, resync=self._reload_statuses)
 
 
     @tasks.loop(seconds=50)
@@ -27,14 +91,20 @@ class StatusCog(commands.Cog):
         if not self.statuses:
             return
 
+        status = self.statuses.next()
+        # Rotating a single status would resend the same presence every tick
+        if status == self.current_status:
+            return
+
         await self.bot.change_presence(
             status=discord.Status.dnd,
             activity=discord.Activity(
                 type=discord.ActivityType.streaming,
-                name=next(self.status_cycle),
+                name=status,
                 url="https://www.youtube.com/watch?v=dQw4w9WgXcQ"
             ),
         )
+        self.current_status = status
 
     @change_status.before_loop
     async def before_change_status(self):
@@ -46,18 +116,25 @@ class StatusCog(commands.Cog):
         description="Manage bot statuses",
     )
 
-    @status_group.command(name="add", description="Add a rotating status")
+    @status_group.command(name="add", description="Add a rotating status", extras={"defer_ephemeral": True})
     @app_commands.checks.has_permissions(ban_members=True)
     async def add(self, interaction: discord.Interaction, status: str):
-        self.statuses.append(status)
-        self.status_cycle = itertools.cycle(self.statuses)
+        if status in self.statuses:
+            await interaction.response.send_message(
+                "❌ That status already exists.",
+                ephemeral=True,
+            )
+            return
+
+        await self.manager.add_status(status)
+        self.statuses.add(status)
 
         await interaction.response.send_message(
             f"✅ **Status added:**\n`{status}`",
             ephemeral=True,
         )
 
-    @status_group.command(name="remove", description="Remove a rotating status")
+    @status_group.command(name="remove", description="Remove a rotating status", extras={"defer_ephemeral": True})
     @app_commands.checks.has_permissions(ban_members=True)
     async def remove(self, interaction: discord.Interaction, status: str):
         if status not in self.statuses:
@@ -67,25 +144,27 @@ class StatusCog(commands.Cog):
             )
             return
 
+        await self.manager.remove_status(status)
         self.statuses.remove(status)
-        self.status_cycle = itertools.cycle(self.statuses)
 
         await interaction.response.send_message(
             f"🗑️ **Status removed:**\n`{status}`",
             ephemeral=True,
         )
 
-    @status_group.command(name="list", description="List all rotating statuses")
+    @status_group.command(name="list", description="List all rotating statuses", extras={"defer_ephemeral": True})
     @app_commands.checks.has_permissions(ban_members=True)
     async def list(self, interaction: discord.Interaction):
         formatted = "\n".join(
             f"{i + 1}. {s}" for i, s in enumerate(self.statuses)
         )
 
-        await interaction.response.send_message(
+        content = await self.bot.paste.fit(
             f"📊 **Current Statuses:**\n{formatted}",
-            ephemeral=True,
+            formatted,
+            notice=f"📊 **{len(self.statuses)} statuses**, too many to list here: {{link}}",
         )
+        await interaction.response.send_message(content, ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
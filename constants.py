@@ -93,6 +93,14 @@ failure_emoji = "<:failure:1443554881196789780>"
 
 
 
+# Challenge awards: a moderator reacting with the emoji on a submission awards the points.
+# Special challenges use the special rule, optimal solutions get the optimal bonus on top.
+challenge_award_rules = {
+    "✅": ("valid", 100),
+    "⭐": ("optimal", 50),
+    "🌟": ("special", 150),
+}
+
 # Special
 tortoise_developers = (197918569894379520, 612349409736392928)
 
@@ -0,0 +1,90 @@
+"""
+Memory held by the member cache under both policies for a synthetic guild.
+
+Only the in-process cost is measured, the gateway round trips of chunking come on
+top of "full" and are only visible in /health on a real deployment.
+
+    python -m scripts.bench_member_cache
+"""
+from __future__ import annotations
+
+import time
+import asyncio
+import tracemalloc
+
+import discord
+from discord.state import ConnectionState
+
+from utils.member_cache import MemberCache
+
+
+def _synthetic_guild(state) -> discord.Guild:
+    everyone = {
+        "id": "1", "name": "@everyone", "permissions": "0", "position": 0,
+        "color": 0, "hoist": False, "managed": False, "mentionable": False,
+    }
+    return discord.Guild(data={"id": "1", "name": "benchmark", "roles": [everyone]}, state=state)
+
+
+def _member_payload(index: int) -> dict:
+    user_id = str(10 ** 17 + index)
+    return {
+        "user": {"id": user_id, "username": f"user{index}", "discriminator": "0", "avatar": None,
+                 "global_name": f"User {index}"},
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def _populate(policy: str, payloads: list[dict], cache_size: int) -> tuple[float, MemberCache, discord.Guild]:
+    intents = discord.Intents.default()
+    intents.members = True
+    state = ConnectionState(
+        dispatch=lambda *args: None,
+        handlers={},
+        hooks={},
+        http=discord.http.HTTPClient(asyncio.get_running_loop()),
+        intents=intents,
+        member_cache_flags=discord.MemberCacheFlags.all() if policy == "full" else discord.MemberCacheFlags.none(),
+    )
+    guild = _synthetic_guild(state)
+    cache = MemberCache(max_size=cache_size)
+
+    start = time.perf_counter()
+    if policy == "full":
+        # What chunking at startup parses and keeps resident
+        for data in payloads:
+            guild._add_member(discord.Member(data=data, guild=guild, state=state))
+    else:
+        # Only members seen in messages are kept, simulate every member talking once
+        for data in payloads:
+            cache.touch(discord.Member(data=data, guild=guild, state=state))
+    return time.perf_counter() - start, cache, guild
+
+
+async def _measure(policy: str, members: int, cache_size: int):
+    payloads = [_member_payload(index) for index in range(members)]
+    elapsed, *_ = _populate(policy, payloads, cache_size)
+
+    # Separate pass, tracemalloc slows allocation down too much to time with it on
+    tracemalloc.start()
+    kept = _populate(policy, payloads, cache_size)
+    resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    # Lazy parses members as they show up in events, nothing of it happens at startup
+    startup = elapsed if policy == "full" else 0.0
+    print(f"{policy:5} {members} members: {resident / 1024 / 1024:6.1f} MiB resident, {startup:5.2f}s parsing at startup")
+
+
+def benchmark(members: int = 50_000, cache_size: int = 5000):
+    asyncio.run(_measure("full", members, cache_size))
+    asyncio.run(_measure("lazy", members, cache_size))
+
+
+if __name__ == "__main__":
+    benchmark()
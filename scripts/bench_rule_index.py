@@ -0,0 +1,20 @@
+"""
+Search latency of the rule index for a mix of number, prefix and typo queries.
+
+    python -m scripts.bench_rule_index
+"""
+import timeit
+
+from utils.rule_index import rule_index
+
+
+def benchmark(runs: int = 2_000):
+    queries = ["", "1", "12", "ad", "spam", "respect", "advertisment", "slefbot", "mentoin", "xyzzy"]
+    print(f"{len(rule_index._keys)} keys, {len(rule_index._fuzzy)} delete variants")
+    for query in queries:
+        seconds = timeit.timeit(lambda: rule_index.search(query), number=runs)
+        print(f"{query!r:16} {seconds / runs * 1_000_000:8.2f} µs  -> {rule_index.search(query)[:5]}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,15 @@
+from discord import Embed
+
+from utils.embed_handler import register_static, static_embed
+
+
+def test_static_embed_copies_do_not_share_fields():
+    def build():
+        embed = Embed(title="Rules")
+        embed.add_field(name="1", value="Be nice")
+        return embed
+
+    register_static("test_rules", build)
+    static_embed("test_rules").add_field(name="2", value="No spam")
+
+    assert len(static_embed("test_rules").fields) == 1
@@ -0,0 +1,21 @@
+from utils.manager import InvalidationBus
+
+
+class Subscriber:
+    async def on_change(self, guild_id, user_id):
+        pass
+
+    async def reload(self):
+        pass
+
+
+def test_reloaded_subscriber_does_not_stack_handlers():
+    bus = InvalidationBus(db=None)
+    for _ in range(3):
+        # Each reload is a new cog instance subscribing, the old one unsubscribed on unload
+        subscriber = Subscriber()
+        bus.subscribe("bot_statuses", subscriber.on_change, resync=subscriber.reload)
+        bus.unsubscribe("bot_statuses", subscriber.on_change, resync=subscriber.reload)
+
+    assert bus._handlers["bot_statuses"] == []
+    assert bus._resyncs == []
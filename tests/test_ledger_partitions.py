@@ -0,0 +1,31 @@
+import asyncio
+from datetime import datetime, timezone
+
+from utils.manager import PointsManager
+
+
+class FakeConnection:
+    def __init__(self, in_transaction: bool):
+        self.in_transaction = in_transaction
+        self.statements: list[str] = []
+
+    def is_in_transaction(self) -> bool:
+        return self.in_transaction
+
+    async def execute(self, query: str, *args):
+        self.statements.append(query)
+
+
+def test_partition_created_inside_a_transaction_is_not_remembered():
+    manager = PointsManager(db=None)
+    when = datetime(2026, 3, 14, tzinfo=timezone.utc)
+
+    replay = FakeConnection(in_transaction=True)
+    asyncio.run(manager._ensure_ledger_partition(replay, when))
+    # The replay transaction may roll back, the next write has to create it again
+    autocommit = FakeConnection(in_transaction=False)
+    asyncio.run(manager._ensure_ledger_partition(autocommit, when))
+    asyncio.run(manager._ensure_ledger_partition(autocommit, when))
+
+    assert len(replay.statements) == 1
+    assert len(autocommit.statements) == 1
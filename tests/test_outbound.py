@@ -0,0 +1,56 @@
+import os
+import time
+import asyncio
+
+import discord
+
+from utils.outbound import OutboundQueue
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, rate_limited_for: float = 0.0):
+        self.id = channel_id
+        self.rate_limited_for = rate_limited_for
+        self.attempts = 0
+        self.sent_at: list[float] = []
+
+    async def send(self, **kwargs):
+        self.attempts += 1
+        if self.rate_limited_for and self.attempts == 1:
+            raise discord.RateLimited(self.rate_limited_for)
+        self.sent_at.append(time.monotonic())
+        return kwargs
+
+
+def test_rate_limited_route_is_parked_without_holding_a_worker():
+    async def run():
+        queue = OutboundQueue(workers=1, coalesce_window=0)
+        queue.start()
+        limited = FakeChannel(1, rate_limited_for=0.3)
+        other = FakeChannel(2)
+
+        started = time.monotonic()
+        limited_future = queue.send(limited, content="first")
+        other_future = queue.send(other, content="second")
+
+        # The only worker isn't stuck on the limited route
+        await asyncio.wait_for(other_future, timeout=0.2)
+        assert not limited_future.done()
+
+        await asyncio.wait_for(limited_future, timeout=1)
+        assert limited.attempts == 2
+        assert limited.sent_at[0] - started >= 0.3
+        assert queue.rate_limited == 1
+        assert queue.failed == 0
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_bot_surfaces_long_rate_limits():
+    os.environ.setdefault("DISCORD_BOT_TOKEN", "token")
+    os.environ.setdefault("DB_URL", "postgresql://localhost/snappy")
+    import bot
+
+    # Without it discord.py sleeps through every 429 and RateLimited never reaches the queue
+    assert bot.MyBot().http.max_ratelimit_timeout == bot.MAX_RATELIMIT_TIMEOUT
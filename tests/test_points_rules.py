@@ -0,0 +1,26 @@
+import asyncio
+
+from utils.points_rules import Award, PointsRulesEngine
+
+
+class FakeManager:
+    """Fails any batch containing a poisoned award, like a constraint violation would."""
+
+    def __init__(self, poisoned_user_id: int):
+        self.poisoned_user_id = poisoned_user_id
+
+    async def award_batch(self, awards):
+        if any(award.user_id == self.poisoned_user_id for award in awards):
+            raise ValueError("bad award")
+        return [(award, award.points) for award in awards]
+
+
+def test_failing_award_is_dropped_and_the_rest_applied():
+    engine = PointsRulesEngine(FakeManager(poisoned_user_id=2), {}, channel_ids=lambda guild_id: frozenset())
+    engine._pending = [Award(1, message_id, "easy", user_id, 5, 9) for message_id, user_id in ((10, 1), (11, 2), (12, 3))]
+
+    applied = asyncio.run(engine.flush())
+
+    assert [award.user_id for award, _ in applied] == [1, 3]
+    assert engine.dropped == 1
+    assert engine.stats()["pending"] == 0
@@ -0,0 +1,39 @@
+import datetime
+
+# Advent of Code puzzles unlock at midnight UTC-5
+AOC_TZ = datetime.timezone(offset=datetime.timedelta(hours=-5))
+
+# AoC asks private leaderboards not to be fetched more than once every 15 minutes
+FAST_POLL_MINUTES = 15
+DEFAULT_POLL_MINUTES = 30
+SLOW_POLL_MINUTES = 60
+# Hours (UTC-5) after the daily unlock with the most leaderboard activity
+UNLOCK_RUSH_HOURS = 3
+# Hours (UTC-5) the leaderboard barely changes
+OVERNIGHT_HOURS = range(3, 9)
+
+
+def aoc_now() -> datetime.datetime:
+    return datetime.datetime.now(tz=AOC_TZ)
+
+
+def last_puzzle_day(year: int) -> int:
+    # The event was shortened to 12 puzzles starting 2025
+    return 12 if year >= 2025 else 25
+
+
+def is_aoc_season(now: datetime.datetime) -> bool:
+    """The day before the first unlock through the end of December."""
+    return now.month == 12 or (now.month == 11 and now.day == 30)
+
+
+def poll_interval_minutes(now: datetime.datetime) -> int:
+    """How long to wait before fetching the leaderboard again."""
+    if now.month != 12 or now.day > last_puzzle_day(now.year):
+        # No new puzzles, only late solves trickle in
+        return SLOW_POLL_MINUTES
+    if now.hour < UNLOCK_RUSH_HOURS:
+        return FAST_POLL_MINUTES
+    if now.hour in OVERNIGHT_HOURS:
+        return SLOW_POLL_MINUTES
+    return DEFAULT_POLL_MINUTES
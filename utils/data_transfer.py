@@ -0,0 +1,80 @@
+"""
+Bulk export/import of guild points and AFK data.
+
+Exports stream through COPY, imports are parsed lazily and COPY'd into a staging
+table followed by one merge upsert (see PointsManager/AFKManager.import_rows).
+
+    python -m utils.data_transfer export points 577192344529404154 points.csv
+    python -m utils.data_transfer import afk 577192344529404154 afk.jsonl --format jsonl
+"""
+import csv
+import json
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Iterator, TextIO
+
+from decouple import config
+
+from utils.manager import AFKManager, Database, PointsManager
+
+TABLES = ("points", "afk")
+FORMATS = ("csv", "jsonl")
+
+
+def _rows(stream: TextIO, fmt: str) -> Iterator[dict]:
+    if fmt == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+
+def read_records(table: str, stream: TextIO, fmt: str = "csv") -> Iterator[tuple]:
+    """
+    Lazily parses an export back into records accepted by the manager import_rows().
+    The guild_id column is ignored, rows are always imported into the target guild.
+    """
+    for row in _rows(stream, fmt):
+        if table == "points":
+            yield int(row["user_id"]), int(row["points"])
+        else:
+            yield int(row["user_id"]), row["reason"] or None, datetime.fromisoformat(row["until"])
+
+
+def get_manager(db: Database, table: str):
+    return PointsManager(db) if table == "points" else AFKManager(db)
+
+
+async def run(action: str, table: str, guild_id: int, path: str, fmt: str):
+    db = Database(config("DB_URL"))
+    await db.connect()
+    manager = get_manager(db, table)
+
+    try:
+        if action == "export":
+            count = await manager.export_rows(guild_id, path, fmt=fmt)
+        else:
+            with open(path, newline="", encoding="utf-8") as stream:
+                count = await manager.import_rows(guild_id, read_records(table, stream, fmt))
+    finally:
+        await db.close()
+
+    print(f"✅ {action}ed {count} {table} rows for guild {guild_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import guild points/AFK data.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("guild_id", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.action, args.table, args.guild_id, args.path, args.format))
+
+
+if __name__ == "__main__":
+    main()
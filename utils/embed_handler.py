@@ -1,7 +1,17 @@
-from typing import Union
+import copy
+from typing import Callable, Dict, Union
 import constants
 from discord import Embed, Color, Member, User
 
+# Pre-built static embeds, stored as payloads so every caller gets its own instance
+_static_embeds: Dict[str, dict] = {}
+
+embed_stats = {
+    "built": 0,
+    "served_from_cache": 0,
+}
+
+
 def get_top_role_color(member: Union[Member, User], *, fallback_color) -> Color:
     """
     Tries to get member top role color and if fails returns fallback_color - This makes it work in DMs.
@@ -23,8 +33,31 @@ def get_top_role_color(member: Union[Member, User], *, fallback_color) -> Color:
         return color
 
 
+def register_static(name: str, builder: Callable[[], Embed]):
+    """
+    Builds a static embed once and keeps it for static_embed().
+    Registering an already known name is a no-op, so cogs can call this on every load.
+    :param name: key to fetch the embed with
+    :param builder: callable returning the embed
+    """
+    if name not in _static_embeds:
+        embed_stats["built"] += 1
+        _static_embeds[name] = builder().to_dict()
+
+
+def static_embed(name: str) -> Embed:
+    """
+    Returns a fresh copy of a pre-built static embed, safe to modify.
+    :param name: key the embed was registered with
+    :return: Embed object
+    """
+    embed_stats["served_from_cache"] += 1
+    # from_dict keeps the payload's fields list and nested dicts, so they are copied too
+    return Embed.from_dict(copy.deepcopy(_static_embeds[name]))
+
 
 def simple_embed(message: str, title: str, color: Color) -> Embed:
+    embed_stats["built"] += 1
     embed = Embed(title=title, description=message, color=color)
     return embed
 
@@ -38,7 +71,7 @@ def info(message: str, member: Union[Member, User], title: str = "Info") -> Embe
     :param title: title of embed, defaults to "Info"
     :return: Embed object
     """
-    return Embed(title=title, description=message, color=get_top_role_color(member, fallback_color=Color.green()))
+    return simple_embed(message, title, get_top_role_color(member, fallback_color=Color.green()))
 
 
 def success(message: str, member: Union[Member, User] = None) -> Embed:
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import time
+import signal
+import asyncio
+import inspect
+from contextlib import contextmanager
+
+from discord.ext import commands, tasks
+
+log = logging.getLogger("snappy.lifecycle")
+
+
+class Lifecycle:
+    """
+    Graceful shutdown on SIGTERM/SIGINT.
+
+    Phases run in order, each one timed:
+    1. unready  - /ready starts answering 503 so the orchestrator stops routing to us
+    2. loops    - loops sleeping between iterations are cancelled, loops in the middle
+                  of one get to finish it (cancelled after drain_timeout)
+    3. cogs     - once /ready has answered 503 for unready_grace seconds, extensions are
+                  unloaded, which also stops the health server
+    4. outbound - queued outbound messages, including whatever the loops and cog unloads
+                  queued last, are flushed, bounded by drain_timeout
+    5. gateway  - the Discord connection and HTTP sessions are closed
+    6. database - the invalidation listener and connection pool are closed
+    """
+
+    def __init__(self, bot: commands.Bot, drain_timeout: float = 10, unready_grace: float = 5):
+        self.bot = bot
+        self.drain_timeout = drain_timeout
+        self.unready_grace = unready_grace
+        self.draining = False
+        self.phase_seconds: dict[str, float] = {}
+        self._shutdown_task: asyncio.Task | None = None
+
+    def install(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.request_shutdown)
+
+    def request_shutdown(self):
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self.shutdown())
+
+    async def wait_closed(self):
+        """Waits for a requested shutdown to finish, bot.start() returns halfway through it."""
+        if self._shutdown_task is not None:
+            await self._shutdown_task
+
+    @contextmanager
+    def _phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = round(time.perf_counter() - start, 3)
+
+    def _running_loops(self) -> list[tasks.Loop]:
+        return [
+            loop
+            for cog in self.bot.cogs.values()
+            for _, loop in inspect.getmembers(cog, lambda member: isinstance(member, tasks.Loop))
+            if loop.is_running()
+        ]
+
+    @staticmethod
+    def _is_sleeping(loop: tasks.Loop) -> bool:
+        # stop() only takes effect after the sleep, which can be an hour long
+        handle = loop._handle
+        return handle is not None and not handle.done()
+
+    async def _stop_loops(self):
+        pending = []
+        for loop in self._running_loops():
+            if self._is_sleeping(loop):
+                loop.cancel()
+            else:
+                loop.stop()
+                if loop.get_task() is not None:
+                    pending.append(loop.get_task())
+
+        if not pending:
+            return
+
+        _, not_done = await asyncio.wait(pending, timeout=self.drain_timeout)
+        for task in not_done:
+            task.cancel()
+
+    async def shutdown(self):
+        log.info("Shutdown requested, draining")
+
+        with self._phase("unready"):
+            self.draining = True
+        unready_at = time.monotonic()
+
+        with self._phase("loops"):
+            await self._stop_loops()
+
+        # Give load balancers a few probes of 503 before the health server goes away
+        await asyncio.sleep(max(0.0, unready_at + self.unready_grace - time.monotonic()))
+
+        with self._phase("cogs"):
+            for extension in list(self.bot.extensions):
+                await self.bot.unload_extension(extension)
+
+        # Last before the gateway closes, so nothing queued after it is cancelled
+        with self._phase("outbound"):
+            drained = await self.bot.outbound.drain(self.drain_timeout)
+            await self.bot.outbound.close()
+        if not drained:
+            log.warning("Outbound queue not empty at deadline, remaining messages dropped")
+
+        with self._phase("gateway"):
+            await self.bot.close()
+            await self.bot.paste.close()
+
+        with self._phase("database"):
+            if self.bot.db is not None:
+                await self.bot.db.close()
+
+        log.info("Shutdown complete", extra={"phase_seconds": self.phase_seconds})
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import sys
+import copy
+import json
+import queue
+import random
+import atexit
+import logging
+import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+
+# Attributes every LogRecord has, anything else came in through extra= and is emitted as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Loggers whose INFO/DEBUG records are only kept at this rate, warnings and errors always pass
+DEFAULT_SAMPLE_RATES = {
+    "snappy.afk.checks": 0.01,
+    "snappy.commands": 0.1,
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with fields passed through extra= (guild_id, command, latency_ms...)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of high-volume loggers, by logger name prefix."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "snappy.afk.checks" wins over "snappy.afk"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if random.random() < rate:
+                    record.sample_rate = rate
+                    return True
+                self.sampled_out += 1
+                return False
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the bounded queue is full the record
+    is dropped and counted. Formatting and I/O happen on the QueueListener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can't cross threads (arguments may be mutated, tracebacks hold frames),
+        # the JSON formatting itself is left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full at shutdown, wait for the writer thread to make room
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    def __init__(self, handler: DroppingQueueHandler, listener: _Listener, sampler: SamplingFilter):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+        self._stopped = False
+
+    def stop(self):
+        """Flushes queued records and stops the listener thread."""
+        if not self._stopped:
+            self._stopped = True
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampler.sampled_out,
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parses "snappy.afk.checks=0.01,snappy.commands=0.1"."""
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(
+    level: str = "INFO",
+    queue_size: int = 10_000,
+    sample_rates: Optional[Dict[str, float]] = None,
+) -> LogPipeline:
+    """Routes the root logger through a bounded queue to a JSON lines stdout handler on its own thread."""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    sampler = SamplingFilter(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates)
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+    listener = _Listener(handler.queue, stream, respect_handler_level=True)
+    listener.start()
+
+    _pipeline = LogPipeline(handler, listener, sampler)
+    atexit.register(_pipeline.stop)
+    return _pipeline
@@ -1,24 +1,604 @@
-from datetime import datetime, timedelta
+import os
+import time
+import logging
+import json
+import uuid
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional
+
 import asyncpg
+import aiosqlite
+
+import constants
+from utils.tracing import traced
+
+log = logging.getLogger("snappy.db")
+
+# Failures meaning Postgres can't be reached, as opposed to a bad query. Not all of
+# InterfaceError: it also covers client-side mistakes such as bad query arguments
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.ConnectionDoesNotExistError,
+)
+
+
+class DatabaseUnavailable(Exception):
+    """Postgres can't be reached or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive connection failures so callers fail fast
+    instead of each waiting on a dead database. Database's recovery probe closes it.
+    """
+
+    def __init__(self, failure_threshold: int = 3):
+        self.failure_threshold = failure_threshold
+        self.failures = 0
+        self.is_open = False
+        self.opened_at: float | None = None
+        self.trips = 0
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Counts a failure, returns whether it opened the breaker."""
+        self.failures += 1
+        if self.is_open or self.failures < self.failure_threshold:
+            return False
+        self.is_open = True
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+        self.failures = 0
+        self.opened_at = None
+
+
+class Journal:
+    """
+    Writes that couldn't reach Postgres, kept in order in a local SQLite file until replayed.
+    Every entry has an op_id, replay records applied op_ids in Postgres (journal_applied),
+    so an entry replayed twice, e.g. after a crash between commit and local delete, applies once.
+    Entries that keep failing to replay are moved to dead_letter so they can't block the rest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: aiosqlite.Connection | None = None
+        self.depth = 0
+        self.dead_letters = 0
+
+    async def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS journal (
+                seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+                op_id   TEXT NOT NULL UNIQUE,
+                kind    TEXT NOT NULL,
+                payload TEXT NOT NULL
+            )
+            """
+        )
+        async with self._conn.execute("PRAGMA table_info(journal)") as cursor:
+            columns = {row[1] for row in await cursor.fetchall()}
+        if "attempts" not in columns:
+            await self._conn.execute("ALTER TABLE journal ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        await self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                seq       INTEGER PRIMARY KEY,
+                op_id     TEXT NOT NULL UNIQUE,
+                kind      TEXT NOT NULL,
+                payload   TEXT NOT NULL,
+                attempts  INTEGER NOT NULL,
+                error     TEXT NOT NULL,
+                failed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        await self._conn.commit()
+        async with self._conn.execute("SELECT COUNT(*) FROM journal") as cursor:
+            self.depth = (await cursor.fetchone())[0]
+        async with self._conn.execute("SELECT COUNT(*) FROM dead_letter") as cursor:
+            self.dead_letters = (await cursor.fetchone())[0]
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def append(self, kind: str, payload: dict):
+        await self._conn.execute(
+            "INSERT INTO journal (op_id, kind, payload) VALUES (?, ?, ?)",
+            (str(uuid.uuid4()), kind, json.dumps(payload)),
+        )
+        await self._conn.commit()
+        self.depth += 1
+
+    async def peek(self, limit: int) -> list[tuple[int, str, str, dict]]:
+        """Oldest entries as (seq, op_id, kind, payload)."""
+        async with self._conn.execute(
+            "SELECT seq, op_id, kind, payload FROM journal ORDER BY seq LIMIT ?", (limit,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [(seq, op_id, kind, json.loads(payload)) for seq, op_id, kind, payload in rows]
+
+    async def remove_through(self, seq: int):
+        cursor = await self._conn.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+        await self._conn.commit()
+        self.depth -= cursor.rowcount
+
+    async def record_failure(self, seq: int) -> int:
+        """Counts a failed replay of the entry, returns how often it has failed."""
+        await self._conn.execute("UPDATE journal SET attempts = attempts + 1 WHERE seq = ?", (seq,))
+        await self._conn.commit()
+        async with self._conn.execute("SELECT attempts FROM journal WHERE seq = ?", (seq,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def dead_letter(self, seq: int, error: str):
+        await self._conn.execute(
+            """
+            INSERT INTO dead_letter (seq, op_id, kind, payload, attempts, error)
+            SELECT seq, op_id, kind, payload, attempts, ? FROM journal WHERE seq = ?
+            """,
+            (error, seq),
+        )
+        cursor = await self._conn.execute("DELETE FROM journal WHERE seq = ?", (seq,))
+        await self._conn.commit()
+        self.depth -= cursor.rowcount
+        self.dead_letters += cursor.rowcount
+
+
+Replayer = Callable[[asyncpg.Connection, dict], Awaitable[None]]
 
 
 class Database:
+    """
+    Connection pool plus the degraded-mode tier: connection failures trip a circuit
+    breaker, writes go through write() and are journaled locally while Postgres is
+    unreachable (or while older journaled writes wait, to keep them in order), and a
+    recovery task probes with backoff and replays the journal in batches once it's back.
+    """
+
+    PROBE_SECONDS = 5
+    MAX_PROBE_SECONDS = 60
+    REPLAY_BATCH_SIZE = 100
+    # Failed replays of one entry (bad payload, constraint violation...) before it's dead-lettered
+    MAX_REPLAY_ATTEMPTS = 3
+    # journal_applied only needs to outlive the journal entries it deduplicates
+    APPLIED_RETENTION_DAYS = 30
 
-    def __init__(self, dsn: str):
+    def __init__(self, dsn: str, journal_path: str | None = None):
         self.dsn = dsn
         self.pool: asyncpg.Pool | None = None
+        # Tags our own connections so the bus can skip notifications we caused
+        self.application_name = f"snappy-{uuid.uuid4().hex[:12]}"
+        self.bus = InvalidationBus(self)
+        self.breaker = CircuitBreaker()
+        # Without a journal path (CLI tools) writes fail with DatabaseUnavailable instead
+        self.journal = Journal(journal_path) if journal_path else None
+        self._replayers: dict[str, Replayer] = {}
+        self._on_replayed: list[Callable[[], Awaitable[None]]] = []
+        self._recovery: asyncio.Task | None = None
+        self.replayed = 0
+        self.replay_rate = 0.0
+        self.last_replay_seconds: float | None = None
 
     async def connect(self):
         if not self.pool:
-            self.pool = await asyncpg.create_pool(self.dsn)
+            self.pool = await asyncpg.create_pool(
+                self.dsn,
+                timeout=self.PROBE_SECONDS,
+                server_settings={"application_name": self.application_name},
+            )
+            await self.pool.execute(
+                """
+                CREATE TABLE IF NOT EXISTS journal_applied (
+                    op_id      UUID PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """
+            )
+
+        if self.journal is not None and self.journal._conn is None:
+            await self.journal.open()
+
+    def resume(self):
+        """Replays writes journaled by a previous run, call once every replayer is registered."""
+        if self.journal is not None and self.journal.depth:
+            log.warning("Replaying %s writes journaled by a previous run", self.journal.depth)
+            self._start_recovery()
 
     async def close(self):
+        await self.bus.stop()
+        if self._recovery is not None:
+            self._recovery.cancel()
         if self.pool:
             await self.pool.close()
+        if self.journal is not None:
+            await self.journal.close()
+
+    @property
+    def degraded(self) -> bool:
+        """Writes are journaled: the breaker is open or older journaled writes are waiting."""
+        return self.breaker.is_open or (self.journal is not None and self.journal.depth > 0)
+
+    def register_replay(self, kind: str, replayer: Replayer):
+        self._replayers[kind] = replayer
+
+    def on_replayed(self, callback: Callable[[], Awaitable[None]]):
+        """callback runs once the journal is drained, to reload state that was served from memory."""
+        self._on_replayed.append(callback)
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Wraps Postgres work. Fails fast while the breaker is open and turns connection
+        failures into DatabaseUnavailable, tripping the breaker when they repeat.
+        """
+        if self.breaker.is_open:
+            raise DatabaseUnavailable("circuit breaker open")
+        try:
+            yield
+        except CONNECTION_ERRORS as e:
+            if self.breaker.record_failure():
+                log.warning("Database unreachable, entering degraded mode: %r", e)
+                self._start_recovery()
+            raise DatabaseUnavailable(repr(e)) from e
+        self.breaker.record_success()
+
+    async def write(self, kind: str, payload: dict, apply: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs apply against Postgres and returns its result, or journals (kind, payload)
+        and returns None when Postgres can't take the write right now.
+        payload must be JSON-serializable, the replayer registered for kind applies it later.
+        """
+        if not self.degraded:
+            try:
+                async with self.guard():
+                    return await apply()
+            except DatabaseUnavailable:
+                if self.journal is None:
+                    raise
+
+        if self.journal is None:
+            raise DatabaseUnavailable("no journal configured")
+        await self.journal.append(kind, payload)
+        self._start_recovery()
+        return None
+
+    def _start_recovery(self):
+        if self.journal is not None and (self._recovery is None or self._recovery.done()):
+            self._recovery = asyncio.create_task(self._recover())
+
+    async def _recover(self):
+        delay = self.PROBE_SECONDS
+        while True:
+            if self.breaker.is_open:
+                await asyncio.sleep(delay)
+                try:
+                    await self.pool.execute("SELECT 1", timeout=self.PROBE_SECONDS)
+                except CONNECTION_ERRORS:
+                    delay = min(delay * 2, self.MAX_PROBE_SECONDS)
+                    continue
+                self.breaker.close()
+                log.info("Database reachable again, replaying %s journaled writes", self.journal.depth)
+
+            try:
+                await self._replay()
+            except CONNECTION_ERRORS as e:
+                if self.breaker.record_failure():
+                    log.warning("Database lost during replay: %r", e)
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                log.exception("Journal replay failed, retrying")
+                await asyncio.sleep(self.MAX_PROBE_SECONDS)
+                continue
+            break
+
+        for callback in self._on_replayed:
+            await callback()
+
+    async def _replay(self):
+        started = time.perf_counter()
+        count = 0
+
+        while self.journal.depth > 0:
+            batch = await self.journal.peek(self.REPLAY_BATCH_SIZE)
+            if not batch:
+                break
+
+            applied_through = None
+            failure: tuple[int, Exception] | None = None
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    for seq, op_id, kind, payload in batch:
+                        try:
+                            # Savepoint, a failing entry rolls back alone
+                            async with conn.transaction():
+                                fresh = await conn.fetchval(
+                                    """
+                                    INSERT INTO journal_applied (op_id) VALUES ($1)
+                                    ON CONFLICT DO NOTHING
+                                    RETURNING true
+                                    """,
+                                    uuid.UUID(op_id),
+                                )
+                                if fresh:
+                                    await self._replayers[kind](conn, payload)
+                        except CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            # Later entries wait so they aren't applied out of order
+                            failure = (seq, e)
+                            break
+                        applied_through = seq
+
+            if applied_through is not None:
+                applied = sum(1 for entry in batch if entry[0] <= applied_through)
+                await self.journal.remove_through(applied_through)
+                count += applied
+                self.replayed += applied
+
+            if failure is not None:
+                seq, error = failure
+                attempts = await self.journal.record_failure(seq)
+                if attempts < self.MAX_REPLAY_ATTEMPTS:
+                    raise error
+                await self.journal.dead_letter(seq, repr(error))
+                log.error("Dead-lettered journal entry %s after %s failed replays: %r", seq, attempts, error)
+
+        if count:
+            elapsed = time.perf_counter() - started
+            self.last_replay_seconds = round(elapsed, 3)
+            self.replay_rate = round(count / elapsed, 1) if elapsed else float(count)
+            log.info("Replayed %s journaled writes in %.2fs", count, elapsed)
+
+        await self.pool.execute(
+            "DELETE FROM journal_applied WHERE applied_at < now() - make_interval(days => $1)",
+            self.APPLIED_RETENTION_DAYS,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "degraded": self.degraded,
+            "breaker_open": self.breaker.is_open,
+            "breaker_trips": self.breaker.trips,
+            "journal_depth": self.journal.depth if self.journal is not None else None,
+            "dead_letters": self.journal.dead_letters if self.journal is not None else None,
+            "replayed": self.replayed,
+            "replay_rate_per_second": self.replay_rate,
+            "last_replay_seconds": self.last_replay_seconds,
+        }
+
+    async def copy_out(self, query: str, *args, output, fmt: str = "csv") -> int:
+        """
+        Streams query results to output with COPY, rows are never materialized in memory.
+        :param output: path, binary file-like object or coroutine function receiving chunks
+        :param fmt: "csv" (with header) or "jsonl" (one JSON object per row)
+        :return: number of rows written
+        """
+        async with self.guard(), self.pool.acquire() as conn:
+            if fmt == "jsonl":
+                # CSV mode with control characters as quote/delimiter leaves the JSON untouched,
+                # text mode would escape every backslash in it
+                result = await conn.copy_from_query(
+                    f"SELECT row_to_json(t) FROM ({query}) t",
+                    *args,
+                    output=output,
+                    format="csv",
+                    quote="\x01",
+                    delimiter="\x02",
+                )
+            else:
+                result = await conn.copy_from_query(
+                    query, *args, output=output, format="csv", header=True
+                )
+        return int(result.split()[-1])
+
+
+InvalidationHandler = Callable[[Optional[int], Optional[int]], Awaitable[None]]
+
+
+class InvalidationBus:
+    """
+    Cache invalidation over Postgres LISTEN/NOTIFY.
+
+    watch() installs a row trigger that publishes (table, guild_id, user_id) on every
+    write, so rows edited by another bot instance or by hand in psql are announced too.
+    A dedicated connection listens and hands notifications to the subscribed handlers.
+    After a disconnect the listener reconnects and runs every resync callback,
+    since notifications sent during the gap are lost.
+    """
+
+    CHANNEL = "snappy_invalidate"
+    HEARTBEAT_SECONDS = 30
+    RECONNECT_SECONDS = 5
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._handlers: dict[str, list[InvalidationHandler]] = {}
+        self._resyncs: list[Callable[[], Awaitable[None]]] = []
+        self._task: asyncio.Task | None = None
+        # Running handler tasks, the event loop only keeps weak references to tasks
+        self._handler_tasks: set[asyncio.Task] = set()
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        self.resyncs = 0
+        self.handler_errors = 0
+
+    async def watch(self, table: str):
+        """Installs the notify trigger on table, safe to call on every startup."""
+        await self.db.pool.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION snappy_notify_invalidation() RETURNS trigger AS $$
+            DECLARE
+                rec JSONB;
+            BEGIN
+                -- Bulk jobs set this and publish a single guild-wide invalidation instead
+                IF current_setting('snappy.skip_notify', true) = 'on' THEN
+                    RETURN NULL;
+                END IF;
+
+                IF TG_OP = 'DELETE' THEN
+                    rec := to_jsonb(OLD);
+                ELSE
+                    rec := to_jsonb(NEW);
+                END IF;
+
+                PERFORM pg_notify('{self.CHANNEL}', json_build_object(
+                    'table', TG_TABLE_NAME,
+                    'guild_id', rec->>'guild_id',
+                    'user_id', rec->>'user_id',
+                    'origin', current_setting('application_name', true)
+                )::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgname = '{table}_invalidate' AND tgrelid = '{table}'::regclass
+                ) THEN
+                    CREATE TRIGGER {table}_invalidate
+                    AFTER INSERT OR UPDATE OR DELETE ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION snappy_notify_invalidation();
+                END IF;
+            END;
+            $$;
+            """
+        )
+
+    def subscribe(
+        self,
+        table: str,
+        handler: InvalidationHandler,
+        resync: Callable[[], Awaitable[None]] | None = None,
+    ):
+        self._handlers.setdefault(table, []).append(handler)
+        if resync is not None:
+            self._resyncs.append(resync)
+
+    def unsubscribe(
+        self,
+        table: str,
+        handler: InvalidationHandler,
+        resync: Callable[[], Awaitable[None]] | None = None,
+    ):
+        """Removes what subscribe() added, cogs call it on unload so reloads don't stack handlers."""
+        handlers = self._handlers.get(table, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if resync is not None and resync in self._resyncs:
+            self._resyncs.remove(resync)
+
+    async def publish(self, table: str, guild_id: int | None = None, user_id: int | None = None):
+        """Manual publish for writes that bypass the row trigger (bulk jobs)."""
+        payload = {"table": table, "guild_id": guild_id, "user_id": user_id, "origin": None}
+        await self.db.pool.execute("SELECT pg_notify($1, $2)", self.CHANNEL, json.dumps(payload))
+
+    def start(self):
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload: str):
+        data = json.loads(payload)
+        if data["origin"] == self.db.application_name:
+            return
+
+        self.received += 1
+        guild_id = int(data["guild_id"]) if data["guild_id"] is not None else None
+        user_id = int(data["user_id"]) if data["user_id"] is not None else None
+        for handler in self._handlers.get(data["table"], ()):
+            task = asyncio.create_task(handler(guild_id, user_id))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_done)
+
+    def _handler_done(self, task: asyncio.Task):
+        self._handler_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.handler_errors += 1
+            log.error("Invalidation handler failed", exc_info=task.exception())
+
+    async def _listen(self):
+        first_connect = True
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.db.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.CHANNEL, self._on_notification)
+                self.connected = True
+
+                if not first_connect:
+                    self.resyncs += 1
+                    for resync in self._resyncs:
+                        await resync()
+                first_connect = False
+
+                # Termination listener catches clean closes, the heartbeat catches dead sockets
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=self.HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1", timeout=self.HEARTBEAT_SECONDS)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                log.warning("Invalidation listener lost: %r", e)
+            except Exception:
+                # A failing resync or anything unexpected must not end the listener for good
+                log.exception("Invalidation listener failed")
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+
+            self.reconnects += 1
+            await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "resyncs": self.resyncs,
+            "handler_errors": self.handler_errors,
+        }
+
 
 class PointsManager:
     def __init__(self, db: Database):
         self.db = db
+        # guild_id -> (period, period_start, min_points, limit) -> leaderboard rows
+        self._leaderboards: dict[int, dict[tuple, list[tuple[int, int]]]] = {}
+        # Monthly ledger partitions known to exist, keyed by (year, month)
+        self._ledger_partitions: set[tuple[int, int]] = set()
+        # (guild_id, user_id) -> last known total, answers get_points while the database is down
+        self._known_totals: OrderedDict[tuple[int, int], int] = OrderedDict()
+        self.known_totals_size = 10_000
 
     async def setup(self):
         await self.db.pool.execute(
@@ -31,64 +611,632 @@ class PointsManager:
             )
             """
         )
+        # Append-only history of every change to points, range-partitioned by month
+        await self.db.pool.execute(
+            """
+            CREATE TABLE IF NOT EXISTS points_ledger (
+                id         BIGSERIAL,
+                guild_id   BIGINT NOT NULL,
+                target_id  BIGINT NOT NULL,
+                actor_id   BIGINT,
+                delta      INTEGER NOT NULL,
+                reason     TEXT,
+                created_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
 
-    async def add_points(self, guild_id: int, user_id: int, amount: int) -> int:
-        row = await self.db.pool.fetchrow(
+            CREATE INDEX IF NOT EXISTS points_ledger_target_idx
+            ON points_ledger (guild_id, target_id, created_at DESC, id DESC);
             """
-            INSERT INTO points (guild_id, user_id, points)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (guild_id, user_id)
-            DO UPDATE SET points = points.points + EXCLUDED.points
-            RETURNING points
+        )
+        now = datetime.now(timezone.utc)
+        async with self.db.pool.acquire() as conn:
+            await self._ensure_ledger_partition(conn, now)
+        await self._record_opening_balances(now)
+
+        # Per period totals, updated with every ledger write so windowed leaderboards
+        # read one (guild, period, period_start) slice instead of scanning the ledger
+        await self.db.pool.execute(
+            """
+            CREATE TABLE IF NOT EXISTS points_rollup (
+                guild_id     BIGINT NOT NULL,
+                period       TEXT NOT NULL,
+                period_start DATE NOT NULL,
+                user_id      BIGINT NOT NULL,
+                points       INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, period, period_start, user_id)
+            ) PARTITION BY LIST (period);
+
+            CREATE TABLE IF NOT EXISTS points_rollup_week PARTITION OF points_rollup FOR VALUES IN ('week');
+            CREATE TABLE IF NOT EXISTS points_rollup_month PARTITION OF points_rollup FOR VALUES IN ('month');
+            CREATE TABLE IF NOT EXISTS points_rollup_season PARTITION OF points_rollup FOR VALUES IN ('season');
+
+            CREATE INDEX IF NOT EXISTS points_rollup_rank_idx
+            ON points_rollup (guild_id, period, period_start, points DESC);
+            """
+        )
+        await self._backfill_rollups()
+        # One row per (message, rule) makes automatic awards idempotent
+        await self.db.pool.execute(
+            """
+            CREATE TABLE IF NOT EXISTS points_awards (
+                message_id BIGINT NOT NULL,
+                rule       TEXT NOT NULL,
+                guild_id   BIGINT NOT NULL,
+                user_id    BIGINT NOT NULL,
+                points     INTEGER NOT NULL,
+                awarded_by BIGINT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (message_id, rule)
+            )
+            """
+        )
+
+        await self.db.bus.watch("points")
+        self.db.bus.subscribe("points", self._invalidate, resync=self._resync)
+        self.db.register_replay("points.delta", self._replay_delta)
+        self.db.register_replay("points.awards", self._replay_awards)
+
+    async def _record_opening_balances(self, now: datetime):
+        """
+        Totals from before the ledger existed become an opening balance entry, otherwise
+        rebuild_totals() would lose them. Done once, a marker row skips the scan of points
+        on later startups.
+        """
+        await self.db.pool.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_markers (
+                name       TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                first_run = await conn.fetchval(
+                    """
+                    INSERT INTO schema_markers (name) VALUES ('points_opening_balance')
+                    ON CONFLICT DO NOTHING
+                    RETURNING true
+                    """
+                )
+                if not first_run:
+                    return
+
+                await conn.execute(
+                    """
+                    INSERT INTO points_ledger (guild_id, target_id, actor_id, delta, reason, created_at)
+                    SELECT p.guild_id, p.user_id, NULL, p.points, 'Opening balance', $1
+                    FROM points p
+                    WHERE p.points <> 0 AND NOT EXISTS (
+                        SELECT 1 FROM points_ledger l
+                        WHERE l.guild_id = p.guild_id AND l.target_id = p.user_id
+                    )
+                    """,
+                    now,
+                )
+
+    @staticmethod
+    def period_starts(when: datetime) -> dict[str, date]:
+        """Start dates (UTC) of the week, month and season (calendar quarter) containing when."""
+        day = when.astimezone(timezone.utc).date()
+        return {
+            "week": day - timedelta(days=day.weekday()),
+            "month": day.replace(day=1),
+            "season": date(day.year, (day.month - 1) // 3 * 3 + 1, 1),
+        }
+
+    async def _backfill_rollups(self):
+        """Fills empty rollups from the ledger once, opening balances are not period awards."""
+        if await self.db.pool.fetchval("SELECT EXISTS (SELECT 1 FROM points_rollup)"):
+            return
+
+        await self.db.pool.execute(
+            """
+            INSERT INTO points_rollup (guild_id, period, period_start, user_id, points)
+            SELECT l.guild_id, p.period, p.period_start, l.target_id, SUM(l.delta)
+            FROM points_ledger l
+            CROSS JOIN LATERAL (
+                VALUES
+                    ('week', date_trunc('week', l.created_at AT TIME ZONE 'UTC')::date),
+                    ('month', date_trunc('month', l.created_at AT TIME ZONE 'UTC')::date),
+                    ('season', date_trunc('quarter', l.created_at AT TIME ZONE 'UTC')::date)
+            ) AS p(period, period_start)
+            WHERE NOT (l.actor_id IS NULL AND l.reason = 'Opening balance')
+            GROUP BY l.guild_id, p.period, p.period_start, l.target_id
+            """
+        )
+
+    async def _ensure_ledger_partition(self, conn: asyncpg.Connection, when: datetime):
+        key = (when.year, when.month)
+        if key in self._ledger_partitions:
+            return
+
+        start = datetime(when.year, when.month, 1, tzinfo=timezone.utc)
+        end = datetime(when.year + (when.month == 12), when.month % 12 + 1, 1, tzinfo=timezone.utc)
+        await conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS points_ledger_{when.year}_{when.month:02}
+            PARTITION OF points_ledger
+            FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+            """
+        )
+        # Inside a transaction (journal replay) the table is gone again if it rolls back,
+        # so it's only remembered when created outside one
+        if not conn.is_in_transaction():
+            self._ledger_partitions.add(key)
+
+    async def _invalidate(self, guild_id: int | None, user_id: int | None):
+        if guild_id is None:
+            self._leaderboards.clear()
+        else:
+            self._leaderboards.pop(guild_id, None)
+
+    async def _resync(self):
+        self._leaderboards.clear()
+
+    async def _apply_delta(
+        self,
+        conn: asyncpg.Connection,
+        guild_id: int,
+        user_id: int,
+        amount: int,
+        actor_id: int | None,
+        reason: str | None,
+        now: datetime,
+    ) -> int:
+        """
+        Changes a total and records the change in the ledger, must run inside a transaction.
+        Totals never go below 0, the ledger stores the delta that was actually applied.
+        """
+        # The row has to exist before it can be locked, FOR UPDATE on a missing row locks
+        # nothing and two concurrent first awards would both read a total of 0
+        await conn.execute(
+            """
+            INSERT INTO points (guild_id, user_id, points) VALUES ($1, $2, 0)
+            ON CONFLICT (guild_id, user_id) DO NOTHING
             """,
             guild_id,
             user_id,
-            amount,
         )
-        return row["points"]
-
-    async def remove_points(self, guild_id: int, user_id: int, amount: int) -> int:
-        row = await self.db.pool.fetchrow(
+        old_total = await conn.fetchval(
+            "SELECT points FROM points WHERE guild_id = $1 AND user_id = $2 FOR UPDATE",
+            guild_id,
+            user_id,
+        )
+        new_total = max(old_total + amount, 0)
+        await conn.execute(
+            "UPDATE points SET points = $3 WHERE guild_id = $1 AND user_id = $2",
+            guild_id,
+            user_id,
+            new_total,
+        )
+        await conn.execute(
             """
-            INSERT INTO points (guild_id, user_id, points)
-            VALUES ($1, $2, 0)
-            ON CONFLICT (guild_id, user_id)
-            DO UPDATE
-            SET points = GREATEST(points.points - $3, 0)
-            RETURNING points
+            INSERT INTO points_ledger (guild_id, target_id, actor_id, delta, reason, created_at)
+            VALUES ($1, $2, $3, $4, $5, $6)
             """,
             guild_id,
             user_id,
-            amount,
+            actor_id,
+            new_total - old_total,
+            reason,
+            now,
         )
-        return row["points"]
 
-    async def get_points(self, guild_id: int, user_id: int) -> int:
-        return await self.db.pool.fetchval(
-            "SELECT points FROM points WHERE guild_id = $1 AND user_id = $2",
+        starts = self.period_starts(now)
+        await conn.execute(
+            """
+            INSERT INTO points_rollup (guild_id, period, period_start, user_id, points)
+            VALUES ($1, 'week', $3, $2, $6),
+                   ($1, 'month', $4, $2, $6),
+                   ($1, 'season', $5, $2, $6)
+            ON CONFLICT (guild_id, period, period_start, user_id)
+            DO UPDATE SET points = points_rollup.points + EXCLUDED.points
+            """,
             guild_id,
             user_id,
-        ) or 0
+            starts["week"],
+            starts["month"],
+            starts["season"],
+            new_total - old_total,
+        )
+        return new_total
 
-    async def get_leaderboard(self, guild_id: int, min_points: int = 1, limit: int = 10):
-        rows = await self.db.pool.fetch(
+    def _remember_total(self, guild_id: int, user_id: int, total: int):
+        self._known_totals[(guild_id, user_id)] = total
+        self._known_totals.move_to_end((guild_id, user_id))
+        if len(self._known_totals) > self.known_totals_size:
+            self._known_totals.popitem(last=False)
+
+    async def _replay_delta(self, conn: asyncpg.Connection, payload: dict):
+        when = datetime.fromisoformat(payload["at"])
+        await self._ensure_ledger_partition(conn, when)
+        await self._apply_delta(
+            conn,
+            payload["guild_id"],
+            payload["user_id"],
+            payload["amount"],
+            payload["actor_id"],
+            payload["reason"],
+            when,
+        )
+        self._leaderboards.pop(payload["guild_id"], None)
+
+    async def _change_points(
+        self,
+        guild_id: int,
+        user_id: int,
+        amount: int,
+        actor_id: int | None,
+        reason: str | None,
+    ) -> int | None:
+        """Returns the new total, an estimate from the last known total or None if the change was journaled."""
+        now = datetime.now(timezone.utc)
+
+        async def apply() -> int:
+            async with self.db.pool.acquire() as conn:
+                await self._ensure_ledger_partition(conn, now)
+                async with conn.transaction():
+                    return await self._apply_delta(conn, guild_id, user_id, amount, actor_id, reason, now)
+
+        new_total = await self.db.write(
+            "points.delta",
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "amount": amount,
+                "actor_id": actor_id,
+                "reason": reason,
+                "at": now.isoformat(),
+            },
+            apply,
+        )
+
+        if new_total is None:
+            # Journaled, leaderboards keep serving the last snapshot until the replay
+            known = self._known_totals.get((guild_id, user_id))
+            if known is None:
+                return None
+            new_total = max(known + amount, 0)
+        else:
+            self._leaderboards.pop(guild_id, None)
+
+        self._remember_total(guild_id, user_id, new_total)
+        return new_total
+
+    @traced("db")
+    async def add_points(
+        self,
+        guild_id: int,
+        user_id: int,
+        amount: int,
+        actor_id: int | None = None,
+        reason: str | None = None,
+    ) -> int | None:
+        return await self._change_points(guild_id, user_id, amount, actor_id, reason)
+
+    @traced("db")
+    async def remove_points(
+        self,
+        guild_id: int,
+        user_id: int,
+        amount: int,
+        actor_id: int | None = None,
+        reason: str | None = None,
+    ) -> int | None:
+        return await self._change_points(guild_id, user_id, -amount, actor_id, reason)
+
+    async def _apply_awards(self, conn: asyncpg.Connection, awards: list[dict], now: datetime) -> list[tuple[int, int]]:
+        """Applies awards inside a transaction, returns (index, new_total) of the ones not awarded before."""
+        applied = []
+        for index, award in enumerate(awards):
+            inserted = await conn.fetchval(
+                """
+                INSERT INTO points_awards (message_id, rule, guild_id, user_id, points, awarded_by)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (message_id, rule) DO NOTHING
+                RETURNING TRUE
+                """,
+                award["message_id"],
+                award["rule"],
+                award["guild_id"],
+                award["user_id"],
+                award["points"],
+                award["awarded_by"],
+            )
+            if not inserted:
+                continue
+
+            new_total = await self._apply_delta(
+                conn,
+                award["guild_id"],
+                award["user_id"],
+                award["points"],
+                award["awarded_by"],
+                f"Challenge: {award['rule']}",
+                now,
+            )
+            applied.append((index, new_total))
+        return applied
+
+    async def _replay_awards(self, conn: asyncpg.Connection, payload: dict):
+        when = datetime.fromisoformat(payload["at"])
+        await self._ensure_ledger_partition(conn, when)
+        await self._apply_awards(conn, payload["awards"], when)
+        for award in payload["awards"]:
+            self._leaderboards.pop(award["guild_id"], None)
+
+    @traced("db")
+    async def award_batch(self, awards: list) -> list[tuple] | None:
+        """
+        Applies rule awards in one transaction, skipping (message, rule) pairs awarded before.
+        :param awards: objects with guild_id, message_id, rule, user_id, points and awarded_by
+        :return: (award, new_total) for every award that was applied, None if the batch was journaled
+        """
+        now = datetime.now(timezone.utc)
+        payload = [
+            {
+                "guild_id": award.guild_id,
+                "message_id": award.message_id,
+                "rule": award.rule,
+                "user_id": award.user_id,
+                "points": award.points,
+                "awarded_by": award.awarded_by,
+            }
+            for award in awards
+        ]
+
+        async def apply() -> list[tuple[int, int]]:
+            async with self.db.pool.acquire() as conn:
+                await self._ensure_ledger_partition(conn, now)
+                async with conn.transaction():
+                    return await self._apply_awards(conn, payload, now)
+
+        applied = await self.db.write("points.awards", {"awards": payload, "at": now.isoformat()}, apply)
+        if applied is None:
+            return None
+
+        for index, _ in applied:
+            self._leaderboards.pop(awards[index].guild_id, None)
+        return [(awards[index], new_total) for index, new_total in applied]
+
+    @traced("db")
+    async def export_rows(self, guild_id: int, output, fmt: str = "csv") -> int:
+        return await self.db.copy_out(
+            "SELECT guild_id, user_id, points FROM points WHERE guild_id = $1 ORDER BY user_id",
+            guild_id,
+            output=output,
+            fmt=fmt,
+        )
+
+    @traced("db")
+    async def import_rows(
+        self,
+        guild_id: int,
+        records: Iterable[tuple[int, int]] | AsyncIterable[tuple[int, int]],
+        actor_id: int | None = None,
+    ) -> int:
+        """
+        Replaces totals of the given users with COPY into a staging table and one merge upsert.
+        Differences to the current totals are recorded in the ledger. A user listed more than
+        once gets the last of their rows.
+        :param records: (user_id, points) rows, may be a lazy (async) iterable
+        :return: number of totals written
+        """
+        now = datetime.now(timezone.utc)
+        async with self.db.guard(), self.db.pool.acquire() as conn:
+            await self._ensure_ledger_partition(conn, now)
+            async with conn.transaction():
+                await conn.execute("SET LOCAL snappy.skip_notify = 'on'")
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE points_import (
+                        row_no  BIGINT GENERATED ALWAYS AS IDENTITY,
+                        user_id BIGINT NOT NULL,
+                        points  INTEGER NOT NULL
+                    ) ON COMMIT DROP
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "points_import", records=records, columns=("user_id", "points")
+                )
+                # Deduplicated once, so the ledger and the totals are written from the same rows
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE points_import_latest ON COMMIT DROP AS
+                    SELECT DISTINCT ON (user_id) user_id, GREATEST(points, 0) AS points
+                    FROM points_import
+                    ORDER BY user_id, row_no DESC
+                    """
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO points_ledger (guild_id, target_id, actor_id, delta, reason, created_at)
+                    SELECT $1, i.user_id, $2, i.points - COALESCE(p.points, 0), 'Import', $3
+                    FROM points_import_latest i
+                    LEFT JOIN points p ON p.guild_id = $1 AND p.user_id = i.user_id
+                    WHERE i.points <> COALESCE(p.points, 0)
+                    """,
+                    guild_id,
+                    actor_id,
+                    now,
+                )
+                result = await conn.execute(
+                    """
+                    INSERT INTO points (guild_id, user_id, points)
+                    SELECT $1, user_id, points
+                    FROM points_import_latest
+                    ON CONFLICT (guild_id, user_id)
+                    DO UPDATE SET points = EXCLUDED.points
+                    """,
+                    guild_id,
+                )
+
+        await self.db.bus.publish("points", guild_id)
+        self._leaderboards.pop(guild_id, None)
+        return int(result.split()[-1])
+
+    @traced("db")
+    async def get_history(
+        self,
+        guild_id: int,
+        user_id: int,
+        limit: int = 10,
+        before: tuple[datetime, int] | None = None,
+    ):
+        """
+        Ledger entries of a user, newest first.
+        :param before: (created_at, id) of the last entry of the previous page, keyset cursor
+        """
+        if before is None:
+            rows = await self.db.pool.fetch(
+                """
+                SELECT id, actor_id, delta, reason, created_at
+                FROM points_ledger
+                WHERE guild_id = $1 AND target_id = $2
+                ORDER BY created_at DESC, id DESC
+                LIMIT $3
+                """,
+                guild_id,
+                user_id,
+                limit,
+            )
+        else:
+            rows = await self.db.pool.fetch(
+                """
+                SELECT id, actor_id, delta, reason, created_at
+                FROM points_ledger
+                WHERE guild_id = $1 AND target_id = $2
+                  AND (created_at, id) < ($3, $4)
+                ORDER BY created_at DESC, id DESC
+                LIMIT $5
+                """,
+                guild_id,
+                user_id,
+                before[0],
+                before[1],
+                limit,
+            )
+        return rows
+
+    @traced("db")
+    async def rebuild_totals(self, guild_id: int) -> int:
+        """
+        Recomputes every total of a guild from the ledger in one set-based statement.
+        :return: number of totals written
+        """
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                # One guild-wide invalidation instead of a notification per row
+                await conn.execute("SET LOCAL snappy.skip_notify = 'on'")
+                result = await conn.execute(
+                    """
+                    INSERT INTO points (guild_id, user_id, points)
+                    SELECT guild_id, target_id, GREATEST(SUM(delta), 0)
+                    FROM points_ledger
+                    WHERE guild_id = $1
+                    GROUP BY guild_id, target_id
+                    ON CONFLICT (guild_id, user_id)
+                    DO UPDATE SET points = EXCLUDED.points
+                    """,
+                    guild_id,
+                )
+
+        await self.db.bus.publish("points", guild_id)
+        self._leaderboards.pop(guild_id, None)
+        return int(result.split()[-1])
+
+    @traced("db")
+    async def get_points(self, guild_id: int, user_id: int) -> int:
+        known = self._known_totals.get((guild_id, user_id))
+        # Postgres doesn't have the journaled changes yet
+        if known is not None and self.db.degraded:
+            return known
+
+        try:
+            async with self.db.guard():
+                total = await self.db.pool.fetchval(
+                    "SELECT points FROM points WHERE guild_id = $1 AND user_id = $2",
+                    guild_id,
+                    user_id,
+                ) or 0
+        except DatabaseUnavailable:
+            if known is None:
+                raise
+            return known
+
+        self._remember_total(guild_id, user_id, total)
+        return total
+
+    @traced("db")
+    async def get_leaderboard(
+        self,
+        guild_id: int,
+        min_points: int = 1,
+        limit: int = 10,
+        period: str | None = None,
+    ):
+        """
+        Top users of a guild, all-time from totals or for the current period from the rollups.
+        :param period: None for all-time, otherwise "week", "month" or "season"
+        """
+        period_start = self.period_starts(datetime.now(timezone.utc))[period] if period else None
+        key = (period, period_start, min_points, limit)
+        cached = self._leaderboards.get(guild_id, {}).get(key)
+        if cached is not None:
+            return cached
+
+        async with self.db.guard():
+            rows = await self._fetch_leaderboard(guild_id, min_points, limit, period, period_start)
+
+        leaderboard = [(r["user_id"], r["points"]) for r in rows]
+        self._leaderboards.setdefault(guild_id, {})[key] = leaderboard
+        return leaderboard
+
+    async def _fetch_leaderboard(
+        self,
+        guild_id: int,
+        min_points: int,
+        limit: int,
+        period: str | None,
+        period_start: date | None,
+    ):
+        if period is None:
+            return await self.db.pool.fetch(
+                """
+                SELECT user_id, points
+                FROM points
+                WHERE guild_id = $1 AND points >= $2
+                ORDER BY points DESC
+                LIMIT $3
+                """,
+                guild_id,
+                min_points,
+                limit,
+            )
+        return await self.db.pool.fetch(
             """
             SELECT user_id, points
-            FROM points
-            WHERE guild_id = $1 AND points >= $2
+            FROM points_rollup
+            WHERE guild_id = $1 AND period = $2 AND period_start = $3 AND points >= $4
             ORDER BY points DESC
-            LIMIT $3
+            LIMIT $5
             """,
             guild_id,
+            period,
+            period_start,
             min_points,
             limit,
         )
-        return [(r["user_id"], r["points"]) for r in rows]
 
 
 class AFKManager:
     def __init__(self, db: Database):
         self.db = db
+        # (guild_id, user_id) -> {"reason": ..., "until": ...}, every AFK row is kept
+        # in memory so the per-message check in AFK.on_message never hits the database
+        self._afk: dict[tuple[int, int], dict] = {}
 
     async def setup(self):
         await self.db.pool.execute(
@@ -102,15 +1250,49 @@ class AFKManager:
             )
             """
         )
+        await self.db.bus.watch("afk_status")
+        self.db.bus.subscribe("afk_status", self._invalidate, resync=self._load_all)
+        self.db.register_replay("afk.set", self._replay_set)
+        self.db.register_replay("afk.remove", self._replay_remove)
+        self.db.on_replayed(self._load_all)
+        await self._load_all()
 
-    async def set_afk(
-        self,
-        guild_id: int,
-        user_id: int,
-        until: datetime,
-        reason: str | None = None,
-    ):
-        await self.db.pool.execute(
+    async def _load_all(self):
+        if self.db.degraded:
+            # The in-memory index has the journaled changes Postgres is missing,
+            # it is reloaded once the journal is replayed
+            return
+
+        rows = await self.db.pool.fetch(
+            "SELECT guild_id, user_id, reason, until FROM afk_status"
+        )
+        self._afk = {
+            (r["guild_id"], r["user_id"]): {"reason": r["reason"], "until": r["until"]}
+            for r in rows
+        }
+
+    async def _invalidate(self, guild_id: int | None, user_id: int | None):
+        if guild_id is None or user_id is None or self.db.degraded:
+            await self._load_all()
+            return
+
+        row = await self.db.pool.fetchrow(
+            """
+            SELECT reason, until
+            FROM afk_status
+            WHERE guild_id = $1 AND user_id = $2
+            """,
+            guild_id,
+            user_id,
+        )
+        if row is None:
+            self._afk.pop((guild_id, user_id), None)
+        else:
+            self._afk[(guild_id, user_id)] = {"reason": row["reason"], "until": row["until"]}
+
+    @staticmethod
+    async def _upsert(conn, guild_id: int, user_id: int, reason: str | None, until: datetime):
+        await conn.execute(
             """
             INSERT INTO afk_status (guild_id, user_id, reason, until)
             VALUES ($1, $2, $3, $4)
@@ -124,8 +1306,9 @@ class AFKManager:
             until,
         )
 
-    async def remove_afk(self, guild_id: int, user_id: int):
-        await self.db.pool.execute(
+    @staticmethod
+    async def _delete(conn, guild_id: int, user_id: int):
+        await conn.execute(
             """
             DELETE FROM afk_status
             WHERE guild_id = $1 AND user_id = $2
@@ -134,24 +1317,297 @@ class AFKManager:
             user_id,
         )
 
-    async def get_afk(self, guild_id: int, user_id: int):
-        row = await self.db.pool.fetchrow(
-            """
-            SELECT reason, until
-            FROM afk_status
-            WHERE guild_id = $1 AND user_id = $2
-            """,
+    async def _replay_set(self, conn: asyncpg.Connection, payload: dict):
+        await self._upsert(
+            conn, payload["guild_id"], payload["user_id"], payload["reason"], datetime.fromisoformat(payload["until"])
+        )
+
+    async def _replay_remove(self, conn: asyncpg.Connection, payload: dict):
+        await self._delete(conn, payload["guild_id"], payload["user_id"])
+
+    @traced("db")
+    async def set_afk(
+        self,
+        guild_id: int,
+        user_id: int,
+        until: datetime,
+        reason: str | None = None,
+    ):
+        await self.db.write(
+            "afk.set",
+            {"guild_id": guild_id, "user_id": user_id, "reason": reason, "until": until.isoformat()},
+            lambda: self._upsert(self.db.pool, guild_id, user_id, reason, until),
+        )
+        self._afk[(guild_id, user_id)] = {"reason": reason, "until": until}
+
+    @traced("db")
+    async def remove_afk(self, guild_id: int, user_id: int):
+        await self.db.write(
+            "afk.remove",
+            {"guild_id": guild_id, "user_id": user_id},
+            lambda: self._delete(self.db.pool, guild_id, user_id),
+        )
+        self._afk.pop((guild_id, user_id), None)
+
+    @traced("db")
+    async def export_rows(self, guild_id: int, output, fmt: str = "csv") -> int:
+        return await self.db.copy_out(
+            "SELECT guild_id, user_id, reason, until FROM afk_status WHERE guild_id = $1 ORDER BY user_id",
             guild_id,
-            user_id,
+            output=output,
+            fmt=fmt,
         )
-        return row
+
+    @traced("db")
+    async def import_rows(
+        self,
+        guild_id: int,
+        records: Iterable[tuple[int, str | None, datetime]] | AsyncIterable[tuple[int, str | None, datetime]],
+    ) -> int:
+        """
+        Upserts AFK statuses with COPY into a staging table and one merge upsert.
+        A user listed more than once gets the last of their rows.
+        :param records: (user_id, reason, until) rows, may be a lazy (async) iterable
+        :return: number of rows written
+        """
+        async with self.db.guard(), self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SET LOCAL snappy.skip_notify = 'on'")
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE afk_import (
+                        row_no  BIGINT GENERATED ALWAYS AS IDENTITY,
+                        user_id BIGINT NOT NULL,
+                        reason  TEXT,
+                        until   TIMESTAMPTZ NOT NULL
+                    ) ON COMMIT DROP
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "afk_import", records=records, columns=("user_id", "reason", "until")
+                )
+                result = await conn.execute(
+                    """
+                    INSERT INTO afk_status (guild_id, user_id, reason, until)
+                    SELECT DISTINCT ON (user_id) $1, user_id, reason, until
+                    FROM afk_import
+                    ORDER BY user_id, row_no DESC
+                    ON CONFLICT (guild_id, user_id)
+                    DO UPDATE SET reason = EXCLUDED.reason,
+                                  until = EXCLUDED.until
+                    """,
+                    guild_id,
+                )
+
+        # Reloads the AFK index of every instance, this one included
+        await self.db.bus.publish("afk_status", guild_id)
+        return int(result.split()[-1])
+
+    async def get_afk(self, guild_id: int, user_id: int):
+        return self._afk.get((guild_id, user_id))
 
     async def get_expired(self):
+        now = datetime.now(timezone.utc)
+        return [key for key, data in self._afk.items() if data["until"] <= now]
+
+class StatusManager:
+    DEFAULT_STATUSES = (
+        "watching Tortoise Community",
+        "solving Leetcode problems 👨‍💻",
+    )
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def setup(self):
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                created = await conn.fetchval("SELECT to_regclass('bot_statuses') IS NULL")
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS bot_statuses (
+                        id     SERIAL PRIMARY KEY,
+                        status TEXT NOT NULL UNIQUE
+                    )
+                    """
+                )
+                # Seeded with the table only, an admin emptying it later keeps it empty
+                if created:
+                    await conn.executemany(
+                        "INSERT INTO bot_statuses (status) VALUES ($1) ON CONFLICT (status) DO NOTHING",
+                        [(status,) for status in self.DEFAULT_STATUSES],
+                    )
+        await self.db.bus.watch("bot_statuses")
+
+    @traced("db")
+    async def get_statuses(self) -> list[str]:
         rows = await self.db.pool.fetch(
+            "SELECT status FROM bot_statuses ORDER BY id"
+        )
+        return [r["status"] for r in rows]
+
+    @traced("db")
+    async def add_status(self, status: str) -> bool:
+        status_id = await self.db.pool.fetchval(
             """
-            SELECT guild_id, user_id
-            FROM afk_status
-            WHERE until <= NOW()
+            INSERT INTO bot_statuses (status)
+            VALUES ($1)
+            ON CONFLICT (status) DO NOTHING
+            RETURNING id
+            """,
+            status,
+        )
+        return status_id is not None
+
+    @traced("db")
+    async def remove_status(self, status: str) -> bool:
+        result = await self.db.pool.execute(
+            "DELETE FROM bot_statuses WHERE status = $1",
+            status,
+        )
+        return result != "DELETE 0"
+
+
+# Per-guild settings, every key defaults to the constant of the same name
+SETTING_KEYS = (
+    "welcome_channel_id",
+    "announcements_channel_id",
+    "react_for_roles_channel_id",
+    "mod_mail_report_channel_id",
+    "bug_reports_channel_id",
+    "code_submissions_channel_id",
+    "suggestions_channel_id",
+    "system_log_channel_id",
+    "deterrence_log_channel_id",
+    "bot_log_channel_id",
+    "successful_verifications_channel_id",
+    "verification_channel_id",
+    "website_log_channel_id",
+    "bot_dev_channel_id",
+    "error_log_channel_id",
+    "member_count_channel_id",
+    "general_channel_id",
+    "staff_channel_id",
+    "leetcode_channel_id",
+    "challenges_channel_id",
+    "bait_channel_id",
+    "muted_role_id",
+    "verified_role_id",
+    "trusted_role_id",
+    "moderator_role",
+    "admin_role",
+    "new_member_role",
+    "challenger_role",
+)
+SETTING_DEFAULTS: dict[str, int] = {key: getattr(constants, key) for key in SETTING_KEYS}
+
+
+class SettingsManager:
+    """
+    Per-guild overrides of the channel and role IDs in constants.
+
+    Every row is loaded in one query at startup and get() is a dict lookup, so event
+    handlers never touch the database. Writes update the cache directly, rows changed
+    by other instances are re-read per guild through the invalidation bus.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        # guild_id -> key -> value, only keys that differ from the defaults
+        self._overrides: dict[int, dict[str, int]] = {}
+        # (guild_id, keys) -> frozenset of resolved IDs, cleared whenever that guild changes
+        self._sets: dict[tuple[int, tuple[str, ...]], frozenset[int]] = {}
+
+    async def setup(self):
+        await self.db.pool.execute(
             """
+            CREATE TABLE IF NOT EXISTS guild_settings (
+                guild_id BIGINT NOT NULL,
+                key      TEXT NOT NULL,
+                value    BIGINT NOT NULL,
+                PRIMARY KEY (guild_id, key)
+            )
+            """
+        )
+        await self.db.bus.watch("guild_settings")
+        self.db.bus.subscribe("guild_settings", self._invalidate, resync=self._load_all)
+        await self._load_all()
+
+    async def _load_all(self):
+        rows = await self.db.pool.fetch("SELECT guild_id, key, value FROM guild_settings")
+        overrides: dict[int, dict[str, int]] = {}
+        for r in rows:
+            overrides.setdefault(r["guild_id"], {})[r["key"]] = r["value"]
+        self._overrides = overrides
+        self._sets.clear()
+
+    async def _invalidate(self, guild_id: int | None, user_id: int | None):
+        if guild_id is None:
+            await self._load_all()
+            return
+
+        rows = await self.db.pool.fetch(
+            "SELECT key, value FROM guild_settings WHERE guild_id = $1", guild_id
         )
-        return [(r["guild_id"], r["user_id"]) for r in rows]
\ No newline at end of file
+        self._set_guild(guild_id, {r["key"]: r["value"] for r in rows})
+
+    def _set_guild(self, guild_id: int, overrides: dict[str, int]):
+        if overrides:
+            self._overrides[guild_id] = overrides
+        else:
+            self._overrides.pop(guild_id, None)
+        for cache_key in [k for k in self._sets if k[0] == guild_id]:
+            del self._sets[cache_key]
+
+    def get(self, guild_id: int, key: str) -> int:
+        overrides = self._overrides.get(guild_id)
+        if overrides is not None and key in overrides:
+            return overrides[key]
+        return SETTING_DEFAULTS[key]
+
+    def get_set(self, guild_id: int, *keys: str) -> frozenset[int]:
+        """The IDs of several keys as a frozenset, for membership checks on hot paths."""
+        cache_key = (guild_id, keys)
+        ids = self._sets.get(cache_key)
+        if ids is None:
+            ids = self._sets[cache_key] = frozenset(self.get(guild_id, key) for key in keys)
+        return ids
+
+    def overrides(self, guild_id: int) -> dict[str, int]:
+        return dict(self._overrides.get(guild_id, {}))
+
+    @traced("db")
+    async def set(self, guild_id: int, key: str, value: int):
+        """Raises DatabaseUnavailable during an outage, settings changes aren't journaled."""
+        if key not in SETTING_DEFAULTS:
+            raise KeyError(key)
+
+        async with self.db.guard():
+            await self.db.pool.execute(
+                """
+                INSERT INTO guild_settings (guild_id, key, value)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (guild_id, key)
+                DO UPDATE SET value = EXCLUDED.value
+                """,
+                guild_id,
+                key,
+                value,
+            )
+        self._set_guild(guild_id, {**self._overrides.get(guild_id, {}), key: value})
+
+    @traced("db")
+    async def reset(self, guild_id: int, key: str):
+        async with self.db.guard():
+            await self.db.pool.execute(
+                "DELETE FROM guild_settings WHERE guild_id = $1 AND key = $2", guild_id, key
+            )
+        overrides = self.overrides(guild_id)
+        overrides.pop(key, None)
+        self._set_guild(guild_id, overrides)
+
+    def stats(self) -> dict:
+        return {
+            "guilds_with_overrides": len(self._overrides),
+            "cached_sets": len(self._sets),
+        }
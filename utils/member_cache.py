@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import discord
+
+from utils.tracing import traced
+
+
+class MemberCache:
+    """
+    Bounded LRU of recently active members.
+
+    Used when the gateway member cache is trimmed (lazy policy) so that members
+    who talk or get referenced stay resolvable without chunking the whole guild.
+    With the full policy the library cache answers first and this stays mostly empty.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._members: OrderedDict[tuple[int, int], discord.Member] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def touch(self, member: discord.Member):
+        """Mark member as recently active, evicting the least recently seen one if full."""
+        key = (member.guild.id, member.id)
+        self._members[key] = member
+        self._members.move_to_end(key)
+
+        if len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+
+    def forget(self, guild_id: int, user_id: int):
+        self._members.pop((guild_id, user_id), None)
+
+    def get(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Cache-only lookup: library member cache first, then the LRU."""
+        member = guild.get_member(user_id)
+        if member is None:
+            member = self._members.get((guild.id, user_id))
+            if member is not None:
+                self._members.move_to_end((guild.id, user_id))
+
+        if member is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return member
+
+    @traced("http")
+    async def get_or_fetch(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Like get() but falls back to a single HTTP fetch on a miss."""
+        member = self.get(guild, user_id)
+        if member is not None:
+            return member
+
+        self.fetches += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.HTTPException:
+            # Gone, or Discord failing right now, callers treat both as "no member"
+            return None
+
+        self.touch(member)
+        return member
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._members),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+        }
+
+
+class DisplayNameResolver:
+    """
+    Resolves display names for many users of a guild at once.
+
+    Names come from a TTL-bounded cache, then the member caches, and whatever is
+    still missing is requested in a single gateway chunk request per 100 users
+    instead of one lookup per user. Users that left the guild are cached as None
+    so they don't trigger a new request on every render. Names are markdown-escaped
+    since they only ever end up in embeds.
+    """
+
+    # Discord caps member chunk requests by user ID at 100 IDs
+    CHUNK_LIMIT = 100
+
+    def __init__(self, member_cache: MemberCache, ttl: float = 600, max_size: int = 10_000):
+        self.member_cache = member_cache
+        self.ttl = ttl
+        self.max_size = max_size
+        self._names: OrderedDict[tuple[int, int], tuple[Optional[str], float]] = OrderedDict()
+        self.hits = 0
+        self.gateway_requests = 0
+
+    def _store(self, guild_id: int, user_id: int, name: Optional[str], now: float):
+        key = (guild_id, user_id)
+        self._names[key] = (name, now + self.ttl)
+        self._names.move_to_end(key)
+
+        if len(self._names) > self.max_size:
+            self._names.popitem(last=False)
+
+    def invalidate(self, guild_id: int, user_id: int):
+        self._names.pop((guild_id, user_id), None)
+
+    @traced("gateway")
+    async def resolve(self, guild: discord.Guild, user_ids: Iterable[int]) -> dict[int, Optional[str]]:
+        """
+        Map every user ID to its escaped display name, or None if the user isn't in the guild.
+        :param guild: guild to resolve members in
+        :param user_ids: user IDs to resolve, typically one leaderboard page
+        :return: dict of user ID to display name
+        """
+        now = time.monotonic()
+        names: dict[int, Optional[str]] = {}
+        missing: list[int] = []
+
+        for user_id in user_ids:
+            cached = self._names.get((guild.id, user_id))
+            if cached is not None and cached[1] > now:
+                self.hits += 1
+                names[user_id] = cached[0]
+                continue
+
+            member = self.member_cache.get(guild, user_id)
+            if member is not None:
+                name = discord.utils.escape_markdown(member.display_name)
+                names[user_id] = name
+                self._store(guild.id, user_id, name, now)
+            else:
+                missing.append(user_id)
+
+        for start in range(0, len(missing), self.CHUNK_LIMIT):
+            chunk = missing[start:start + self.CHUNK_LIMIT]
+            self.gateway_requests += 1
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+            except asyncio.TimeoutError:
+                # Don't negatively cache on timeout, just render the fallback this time
+                names.update({user_id: None for user_id in chunk})
+                continue
+
+            found = {member.id: member for member in members}
+            for user_id in chunk:
+                member = found.get(user_id)
+                if member is not None:
+                    self.member_cache.touch(member)
+                name = discord.utils.escape_markdown(member.display_name) if member is not None else None
+                names[user_id] = name
+                self._store(guild.id, user_id, name, now)
+
+        return names
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._names),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "gateway_requests": self.gateway_requests,
+        }
+
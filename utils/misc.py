@@ -1,8 +1,75 @@
+import asyncio
 import datetime
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable
+
+from decouple import config
+
+# Written at image build time, see Dockerfile
+BUILD_VERSION_FILE = Path(__file__).resolve().parent.parent / "BUILD_VERSION"
+
+
+class BoundedSet:
+    """Set that forgets its oldest entries once it holds more than maxlen items."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: OrderedDict[Hashable, None] = OrderedDict()
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Hashable):
+        self._items[item] = None
+        self._items.move_to_end(item)
+        if len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+    def discard(self, item: Hashable):
+        self._items.pop(item, None)
+
 
 def format_timedelta(time_delta: datetime.timedelta) -> str:
     total_seconds = int(time_delta.total_seconds())
     days, remainder = divmod(total_seconds, 60 * 60 * 24)
     hours, remainder = divmod(remainder, 60 * 60)
     minutes, seconds = divmod(remainder, 60)
-    return f"{days}d {hours}h {minutes}m and {seconds}s"
\ No newline at end of file
+    return f"{days}d {hours}h {minutes}m and {seconds}s"
+
+
+async def resolve_build_version() -> str:
+    """
+    Build version from BOT_BUILD_VERSION, the baked-in BUILD_VERSION file or, as a fallback,
+    an async `git rev-parse` so the event loop is never blocked.
+    """
+    version = config("BOT_BUILD_VERSION", "")
+    if version:
+        return version
+
+    if BUILD_VERSION_FILE.is_file():
+        version = BUILD_VERSION_FILE.read_text().strip()
+        if version:
+            return version
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git", "rev-parse", "--short", "HEAD",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return "mystery-build"
+
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=5)
+    except asyncio.TimeoutError:
+        # Not left running in the background, and reaped so it doesn't linger as a zombie
+        process.kill()
+        await process.wait()
+        return "mystery-build"
+
+    return stdout.decode().strip() or "mystery-build"
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import asyncio
+import itertools
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, Hashable, Optional
+
+import discord
+
+log = logging.getLogger("snappy.outbound")
+
+
+class Priority(IntEnum):
+    CHANNEL = 1
+    DM = 2
+
+
+class _Outbound:
+    __slots__ = ("route", "destination", "priority", "kwargs", "future", "enqueued_at", "coalesced")
+
+    def __init__(self, route, destination, priority: Priority, kwargs: dict, future: asyncio.Future):
+        self.route = route
+        self.destination = destination
+        self.priority = priority
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.coalesced = 0
+
+
+class _Bucket:
+    __slots__ = ("route", "items", "queued", "blocked_until")
+
+    def __init__(self, route):
+        self.route = route
+        self.items: Deque[_Outbound] = deque()
+        self.queued = False
+        self.blocked_until = 0.0
+
+
+def _log_failure(future: asyncio.Future):
+    # Retrieving the exception here keeps fire-and-forget sends quiet,
+    # callers awaiting the future still get it raised.
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None and not isinstance(error, discord.Forbidden):
+        log.warning("Outbound message failed: %r", error)
+
+
+class OutboundQueue:
+    """
+    Central queue for outbound Discord messages.
+
+    Every destination (channel or DM) gets its own bucket so a rate limited route only
+    delays itself and messages to the same route keep their order. That needs the client's
+    max_ratelimit_timeout: 429s longer than it raise RateLimited, which parks the bucket
+    instead of holding a worker, shorter ones are still waited out inside the request.
+    Embed-only messages to the same channel sent within coalesce_window are merged
+    into one message (up to 10 embeds). Buckets are served by priority, DMs last.
+    Interaction followups don't go through here, they are awaited by the command and
+    must not wait behind channel traffic.
+    """
+
+    MAX_EMBEDS = 10
+
+    def __init__(self, workers: int = 4, coalesce_window: float = 0.5):
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+
+        self._seq = itertools.count()
+        self._ready: asyncio.PriorityQueue | None = None
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        # Items still accepting coalesced embeds, keyed by route
+        self._open: Dict[Hashable, _Outbound] = {}
+        self._tasks: list[asyncio.Task] = []
+
+        self._waits: Deque[float] = deque(maxlen=500)
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    def start(self):
+        self._ready = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    @staticmethod
+    def _route(destination) -> Hashable:
+        if isinstance(destination, discord.abc.User):
+            return "dm", destination.id
+        return "channel", destination.id
+
+    def _can_coalesce(self, kwargs: dict) -> bool:
+        return (
+            self.coalesce_window > 0
+            and bool(kwargs)
+            and kwargs.keys() <= {"embed", "embeds"}
+        )
+
+    @staticmethod
+    def _embeds(kwargs: dict) -> list[discord.Embed]:
+        if "embeds" in kwargs:
+            return list(kwargs["embeds"])
+        return [kwargs["embed"]]
+
+    def send(
+        self,
+        destination: discord.abc.Messageable,
+        *,
+        priority: Priority = Priority.CHANNEL,
+        **kwargs: Any,
+    ) -> asyncio.Future:
+        """
+        Queues a message, returns immediately.
+        :param destination: anything with a send() coroutine - channel or member/user
+        :param priority: scheduling class of the message
+        :param kwargs: passed to destination.send()
+        :return: future resolving to the sent message, can be ignored for fire-and-forget sends
+        """
+        route = self._route(destination)
+
+        if self._can_coalesce(kwargs):
+            pending = self._open.get(route)
+            embeds = self._embeds(kwargs)
+            if (
+                pending is not None
+                and pending.priority == priority
+                and len(pending.kwargs["embeds"]) + len(embeds) <= self.MAX_EMBEDS
+            ):
+                pending.kwargs["embeds"].extend(embeds)
+                pending.coalesced += 1
+                self.coalesced += 1
+                return pending.future
+
+            future = asyncio.get_running_loop().create_future()
+            future.add_done_callback(_log_failure)
+            item = _Outbound(route, destination, priority, {"embeds": embeds}, future)
+            self._open[route] = item
+            asyncio.get_running_loop().call_later(self.coalesce_window, self._seal, item)
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_log_failure)
+        self._enqueue(_Outbound(route, destination, priority, kwargs, future))
+        return future
+
+    def _seal(self, item: _Outbound):
+        # Already sealed early by drain()
+        if self._open.get(item.route) is not item:
+            return
+        del self._open[item.route]
+        self._enqueue(item)
+
+    def _enqueue(self, item: _Outbound):
+        bucket = self._buckets.get(item.route)
+        if bucket is None:
+            bucket = self._buckets[item.route] = _Bucket(item.route)
+        bucket.items.append(item)
+        self._schedule(bucket)
+
+    def _schedule(self, bucket: _Bucket):
+        if bucket.queued or not bucket.items:
+            return
+
+        bucket.queued = True
+        delay = bucket.blocked_until - time.monotonic()
+        entry = (bucket.items[0].priority, next(self._seq), bucket)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, entry)
+        else:
+            self._ready.put_nowait(entry)
+
+    async def _worker(self):
+        while True:
+            _, _, bucket = await self._ready.get()
+            item = bucket.items[0]
+
+            try:
+                message = await item.destination.send(**item.kwargs)
+            except discord.RateLimited as e:
+                # The item stays at the head of its bucket and is retried once the route opens
+                self.rate_limited += 1
+                bucket.blocked_until = time.monotonic() + e.retry_after
+            except Exception as e:
+                self._finish(bucket, item, error=e)
+            else:
+                self._finish(bucket, item, message=message)
+            finally:
+                bucket.queued = False
+                self._ready.task_done()
+
+            if bucket.items:
+                self._schedule(bucket)
+            else:
+                del self._buckets[bucket.route]
+
+    def _finish(self, bucket: _Bucket, item: _Outbound, *, message=None, error: Optional[Exception] = None):
+        bucket.items.popleft()
+        self._waits.append(time.monotonic() - item.enqueued_at)
+
+        if item.future.done():
+            return
+        if error is not None:
+            self.failed += 1
+            item.future.set_exception(error)
+        else:
+            self.sent += 1
+            item.future.set_result(message)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Flushes pending coalesced messages and waits for the queue to empty.
+        :return: True if everything was sent before the timeout
+        """
+        for item in list(self._open.values()):
+            self._seal(item)
+
+        deadline = time.monotonic() + timeout
+        while self.depth and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.depth == 0
+
+    async def close(self):
+        """Stops the workers, messages still queued are cancelled."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for bucket in self._buckets.values():
+            for item in bucket.items:
+                item.future.cancel()
+        self._buckets.clear()
+
+    @property
+    def depth(self) -> int:
+        return len(self._open) + sum(len(bucket.items) for bucket in self._buckets.values())
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "depth": self.depth,
+            "routes": len(self._buckets),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0,
+            "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0,
+            "wait_ms_max": round(waits[-1] * 1000, 2) if waits else 0,
+        }
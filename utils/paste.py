@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict
+
+import aiohttp
+
+from utils.tracing import traced
+
+
+class PasteService:
+    """
+    Offloads output too long for a Discord message to a hastebin-style paste service.
+
+    One aiohttp session (and its connection pool) is reused for every upload. Uploads are
+    cached by the SHA-256 of their body, so identical output is only uploaded once, and
+    concurrent uploads of the same body share a single request.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        link: str,
+        threshold: int,
+        cache_size: int = 256,
+        timeout: float = 10,
+    ):
+        # POST endpoint answering {"key": ...}, the paste is then served at link + key
+        self.endpoint = endpoint
+        self.link = link
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: aiohttp.ClientSession | None = None
+        self._links: OrderedDict[str, str] = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.uploads = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=8),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def too_long(self, rendered: str) -> bool:
+        return len(rendered) > self.threshold
+
+    @traced("http")
+    async def _post(self, body: str) -> str:
+        async with self._get_session().post(self.endpoint, data=body.encode("utf-8")) as resp:
+            resp.raise_for_status()
+            data = await resp.json(content_type=None)
+        return self.link + data["key"]
+
+    async def upload(self, body: str) -> str:
+        """Uploads body and returns its link. Raises aiohttp.ClientError or KeyError on failure."""
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+        link = self._links.get(digest)
+        if link is not None:
+            self._links.move_to_end(digest)
+            self.cache_hits += 1
+            return link
+
+        in_flight = self._in_flight.get(digest)
+        if in_flight is not None:
+            self.cache_hits += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The uploader was cancelled, not us: take over the upload
+                if in_flight.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.upload(body)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[digest] = future
+        try:
+            link = await self._post(body)
+        except Exception as e:
+            self.failures += 1
+            future.set_exception(e)
+            # Nobody else may be waiting, don't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(link)
+        finally:
+            # Only left unresolved when we were cancelled mid-upload, waiters must not hang
+            if not future.done():
+                future.cancel()
+            del self._in_flight[digest]
+
+        self.uploads += 1
+        self._links[digest] = link
+        if len(self._links) > self.cache_size:
+            self._links.popitem(last=False)
+        return link
+
+    async def fit(self, rendered: str, body: str | None = None, *, notice: str = "📄 Output too long, see {link}") -> str:
+        """
+        Returns rendered if it fits under the threshold, otherwise uploads body (defaults to
+        rendered) and returns notice with the link. If the upload fails, rendered is truncated.
+        """
+        if not self.too_long(rendered):
+            return rendered
+
+        try:
+            link = await self.upload(body if body is not None else rendered)
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            return self._truncate(rendered)
+        return notice.format(link=link)
+
+    def _truncate(self, rendered: str) -> str:
+        truncated = rendered[:self.threshold - 1] + "…"
+        if truncated.count("```") % 2 == 0:
+            return truncated
+
+        # Cut inside a code block, close it again or the rest of the message renders as code
+        closing = "\n```"
+        truncated = rendered[:self.threshold - 1 - len(closing)] + "…"
+        return truncated + closing if truncated.count("```") % 2 else truncated
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "cache_hits": self.cache_hits,
+            "failures": self.failures,
+            "cached_links": len(self._links),
+        }
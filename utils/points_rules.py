@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable, NamedTuple
+
+import discord
+
+from utils.misc import BoundedSet
+
+log = logging.getLogger("snappy.points_rules")
+
+
+class Award(NamedTuple):
+    guild_id: int
+    message_id: int
+    rule: str
+    user_id: int
+    points: int
+    awarded_by: int
+
+
+class PointsRulesEngine:
+    """
+    Turns moderator reactions on challenge submissions into point awards.
+
+    Reactions are filtered on the guild's submission channel IDs before anything else,
+    recently seen (message, rule) pairs are dropped in memory and the unique key on
+    points_awards catches the rest (restarts, other instances). Accepted awards are
+    buffered and applied in one transaction per flush(). When that transaction fails the
+    awards are applied one by one and the ones failing on their own are dropped, so one
+    bad award can't hold up the rest or grow the buffer forever.
+    """
+
+    def __init__(
+        self,
+        manager,
+        rules: dict[str, tuple[str, int]],
+        channel_ids: Callable[[int], frozenset[int]],
+        dedup_size: int = 10_000,
+    ):
+        self.manager = manager
+        self.rules = rules
+        # guild_id -> submission channel IDs, has to be cheap (cached settings)
+        self.channel_ids = channel_ids
+        self._seen = BoundedSet(dedup_size)
+        self._pending: list[Award] = []
+        self.ignored = 0
+        self.applied = 0
+        self.duplicates = 0
+        self.flush_failures = 0
+        self.dropped = 0
+        self.journaled = 0
+
+    def handle_reaction(self, payload: discord.RawReactionActionEvent) -> bool:
+        """
+        Queues the award a reaction stands for, returns whether one was queued.
+        Cheap and synchronous, the database is only touched in flush().
+        """
+        if payload.guild_id is None or payload.channel_id not in self.channel_ids(payload.guild_id):
+            return False
+
+        rule = self.rules.get(str(payload.emoji))
+        if rule is None:
+            return False
+
+        member = payload.member
+        if member is None or member.bot or not member.guild_permissions.ban_members:
+            self.ignored += 1
+            return False
+
+        author_id = payload.message_author_id
+        if author_id is None or author_id == member.id:
+            self.ignored += 1
+            return False
+
+        rule_name, points = rule
+        key = (payload.message_id, rule_name)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+
+        self._pending.append(
+            Award(payload.guild_id, payload.message_id, rule_name, author_id, points, member.id)
+        )
+        return True
+
+    async def flush(self) -> list[tuple[Award, int]]:
+        """Applies buffered awards in one transaction, returns (award, new_total) of applied ones."""
+        if not self._pending:
+            return []
+
+        pending, self._pending = self._pending, []
+        try:
+            applied = await self.manager.award_batch(pending)
+        except Exception as e:
+            self.flush_failures += 1
+            log.warning("Applying %d challenge awards failed, retrying one by one: %r", len(pending), e)
+            return await self._apply_each(pending)
+
+        if applied is None:
+            # The database is down, the batch is journaled and applied on replay (without DMs)
+            self.journaled += len(pending)
+            return []
+
+        self.applied += len(applied)
+        self.duplicates += len(pending) - len(applied)
+        return applied
+
+    async def _apply_each(self, awards: list[Award]) -> list[tuple[Award, int]]:
+        applied = []
+        for award in awards:
+            try:
+                result = await self.manager.award_batch([award])
+            except Exception as e:
+                self.dropped += 1
+                log.warning("Dropping challenge award %r: %r", award, e, extra={"guild_id": award.guild_id})
+                continue
+
+            if result is None:
+                self.journaled += 1
+            elif result:
+                self.applied += 1
+                applied.extend(result)
+            else:
+                self.duplicates += 1
+        return applied
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "applied": self.applied,
+            "duplicates": self.duplicates,
+            "ignored": self.ignored,
+            "flush_failures": self.flush_failures,
+            "dropped": self.dropped,
+            "journaled": self.journaled,
+        }
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+
+
+class RaidDetector:
+    """
+    Per-guild sliding-window join rate. A guild is in a raid once `threshold` joins land
+    within `window` seconds, and stays in it until `cooldown` seconds pass after the
+    rate last crossed the threshold, so a raid arriving in waves is one raid.
+    """
+
+    def __init__(self, threshold: int = 10, window: float = 10.0, cooldown: float = 120.0):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        # guild_id -> join timestamps inside the window, never more than threshold of them
+        self._joins: dict[int, deque[float]] = {}
+        # guild_id -> monotonic time the raid ends unless more joins extend it
+        self._raid_until: dict[int, float] = {}
+        self.raids = 0
+
+    def record_join(self, guild_id: int, now: float | None = None) -> bool:
+        """Counts a join, returns True when it starts a raid."""
+        now = time.monotonic() if now is None else now
+        joins = self._joins.setdefault(guild_id, deque(maxlen=self.threshold))
+        joins.append(now)
+
+        if len(joins) < self.threshold or now - joins[0] > self.window:
+            return False
+
+        started = not self.in_raid(guild_id, now)
+        self._raid_until[guild_id] = now + self.cooldown
+        if started:
+            self.raids += 1
+        return started
+
+    def in_raid(self, guild_id: int, now: float | None = None) -> bool:
+        until = self._raid_until.get(guild_id)
+        if until is None:
+            return False
+        if (time.monotonic() if now is None else now) < until:
+            return True
+        del self._raid_until[guild_id]
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "raids_detected": self.raids,
+            "guilds_in_raid": sum(1 for guild_id in list(self._raid_until) if self.in_raid(guild_id)),
+        }
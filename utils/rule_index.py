@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Set, Tuple
+
+from constants import RULES
+
+
+# Queries shorter than this only match by prefix, a typo in 1-2 characters matches everything
+MIN_FUZZY_LENGTH = 3
+# Queries of this length and longer tolerate two edits instead of one
+LONG_QUERY_LENGTH = 6
+MAX_DISTANCE = 2
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _max_distance(length: int) -> int:
+    return 2 if length >= LONG_QUERY_LENGTH else 1
+
+
+def _deletes(term: str, distance: int) -> Set[str]:
+    """Every string obtainable from term by deleting up to `distance` characters."""
+    variants = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def _bounded_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance between a and b (a swap of two adjacent characters counts as one edit).
+    Stops as soon as the distance is known to exceed limit and returns limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class RuleIndex:
+    """
+    Lookup of rules by number, title, title words and aliases, built once.
+
+    Prefix matches come from a sorted key list and two bisects. Typos are matched
+    through a deletion neighborhood (symmetric delete) of every key prefix, so a
+    query only generates its own deletes and does dict lookups, no key list scans.
+    """
+
+    def __init__(self, rules: Dict[int, dict]):
+        self.rules = rules
+
+        pairs: Set[Tuple[str, int]] = set()
+        for number, rule in rules.items():
+            title = _normalize(rule["title"])
+            pairs.add((str(number), number))
+            pairs.add((title, number))
+            pairs.update((word, number) for word in title.split())
+            pairs.update((_normalize(alias), number) for alias in rule["aliases"])
+
+        self._keys, self._numbers = zip(*sorted(pairs)) if pairs else ((), ())
+
+        # delete variant -> (key prefix, rule number) pairs it came from
+        self._fuzzy: Dict[str, Set[Tuple[str, int]]] = {}
+        for key, number in pairs:
+            if key.isdigit():
+                continue
+            for length in range(MIN_FUZZY_LENGTH, len(key) + 1):
+                prefix = key[:length]
+                for variant in _deletes(prefix, MAX_DISTANCE):
+                    self._fuzzy.setdefault(variant, set()).add((prefix, number))
+
+        self._all = tuple(sorted(rules))
+
+    def _prefix(self, query: str) -> List[int]:
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + "\uffff", lo=start)
+        return list(dict.fromkeys(self._numbers[start:end]))
+
+    def _typo(self, query: str) -> List[int]:
+        limit = _max_distance(len(query))
+        candidates: Set[Tuple[str, int]] = set()
+        for variant in _deletes(query, limit):
+            candidates.update(self._fuzzy.get(variant, ()))
+
+        # Shared deletes only bound the distance, verify it once per distinct prefix
+        distances: Dict[str, int] = {}
+        best: Dict[int, int] = {}
+        for prefix, number in candidates:
+            if prefix not in distances:
+                distances[prefix] = _bounded_distance(query, prefix, limit)
+            distance = distances[prefix]
+            if distance <= limit and distance < best.get(number, limit + 1):
+                best[number] = distance
+        return sorted(best, key=lambda number: (best[number], number))
+
+    def search(self, query: str, limit: int = 25) -> List[int]:
+        """Rule numbers matching query, exact number first, then prefix matches, typo matches if there are none."""
+        query = _normalize(query)
+        if not query:
+            return list(self._all[:limit])
+
+        results = self._prefix(query)
+        if query.isdigit() and int(query) in self.rules:
+            results.remove(int(query))
+            results.insert(0, int(query))
+
+        if not results and len(query) >= MIN_FUZZY_LENGTH:
+            results = self._typo(query)
+
+        return results[:limit]
+
+    def resolve(self, query: str) -> int | None:
+        """Best matching rule number for query, or None."""
+        results = self.search(query, limit=1)
+        return results[0] if results else None
+
+
+rule_index = RuleIndex(RULES)
+
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class _ImportTimer:
+    """
+    sys.meta_path finder that times the execution of every module imported while installed.
+    It delegates the actual lookup to the finders behind it and only wraps exec_module,
+    keeping a stack so each module gets its own time with nested imports subtracted.
+    """
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+        self._stack: List[float] = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        # Builtin and frozen importers are classes shared by every module, leave them alone
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                nested = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += total
+                self.profiler.imports[name] = (total - nested, total)
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+
+class StartupProfiler:
+    """
+    Cold-start profile of the process: per-module import times (like -X importtime, but
+    kept as data), named startup phases and per-cog setup times, all relative to the
+    moment this module was imported. Import timing only runs when enabled, phases are
+    always recorded since they are a handful of perf_counter calls.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        # module -> (self seconds, cumulative seconds)
+        self.imports: Dict[str, tuple[float, float]] = {}
+        self.phases: Dict[str, float] = {}
+        self.cogs: Dict[str, float] = {}
+        # Seconds since start at which a milestone was reached
+        self.milestones: Dict[str, float] = {}
+        self._timer: Optional[_ImportTimer] = None
+
+    def install(self):
+        if self.enabled and self._timer is None:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def uninstall(self):
+        if self._timer is not None:
+            sys.meta_path.remove(self._timer)
+            self._timer = None
+
+    @contextmanager
+    def phase(self, name: str, group: str = "phases"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            getattr(self, group)[name] = time.perf_counter() - start
+
+    def milestone(self, name: str):
+        self.milestones.setdefault(name, time.perf_counter() - self.started)
+
+    def report(self, top: int = 15) -> dict:
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            "enabled": self.enabled,
+            "milestones_seconds": {name: round(seconds, 3) for name, seconds in self.milestones.items()},
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "cogs_ms": {name: round(seconds * 1000, 1) for name, seconds in self.cogs.items()},
+            "modules_imported": len(self.imports),
+            "slowest_imports_ms": [
+                {"module": name, "self": round(own * 1000, 1), "cumulative": round(total * 1000, 1)}
+                for name, (own, total) in slowest
+            ],
+        }
+
+
+# Read straight from the environment, this runs before anything else is imported
+profiler = StartupProfiler(enabled=os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes"))
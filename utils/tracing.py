@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import logging
+import functools
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+import discord
+from discord import app_commands
+
+log = logging.getLogger("snappy.commands")
+
+
+class CommandTrace:
+    __slots__ = ("command", "started", "first_response", "spans", "error")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.started = time.perf_counter()
+        self.first_response: Optional[float] = None
+        # span kind ("db", "http", "gateway") -> seconds spent
+        self.spans: Dict[str, float] = defaultdict(float)
+        self.error: Optional[str] = None
+
+
+_current_trace: ContextVar[Optional[CommandTrace]] = ContextVar("current_trace", default=None)
+
+
+def traced(kind: str):
+    """
+    Adds the run time of the decorated coroutine to the current command trace as a kind sub-span.
+    Outside of a traced command it does nothing beyond the call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return await func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                trace.spans[kind] += time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+class TracedResponse(discord.InteractionResponse):
+    """
+    InteractionResponse that stamps the time of the first response on the interaction trace
+    and supports auto-defer: once auto_defer() acknowledged the interaction on behalf of a slow
+    handler, the handler's own defer() becomes a no-op and send_message() goes to the followup.
+    """
+
+    __slots__ = ()
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        # Serializes the auto-defer timer with the handler's own response
+        return self._parent.extras.setdefault("response_lock", asyncio.Lock())
+
+    @property
+    def auto_deferred(self) -> bool:
+        return self._parent.extras.get("auto_deferred", False)
+
+    def _mark(self):
+        handle = self._parent.extras.pop("auto_defer_handle", None)
+        if handle is not None:
+            handle.cancel()
+
+        trace = self._parent.extras.get("trace")
+        if trace is not None and trace.first_response is None:
+            trace.first_response = time.perf_counter()
+
+    async def auto_defer(self, ephemeral: bool = False) -> bool:
+        """Defers if nothing has responded yet, returns whether it did."""
+        async with self._lock:
+            if self.is_done():
+                return False
+            await super().defer(ephemeral=ephemeral, thinking=True)
+            self._parent.extras["auto_deferred"] = True
+            self._mark()
+            return True
+
+    async def defer(self, **kwargs):
+        async with self._lock:
+            if self.auto_deferred:
+                return None
+            result = await super().defer(**kwargs)
+            self._mark()
+            return result
+
+    async def send_message(self, *args, **kwargs):
+        async with self._lock:
+            if self.auto_deferred:
+                # Followups don't support delete_after
+                kwargs.pop("delete_after", None)
+                return await self._parent.followup.send(*args, **kwargs)
+            result = await super().send_message(*args, **kwargs)
+            self._mark()
+            return result
+
+    async def edit_message(self, **kwargs):
+        async with self._lock:
+            result = await super().edit_message(**kwargs)
+            self._mark()
+            return result
+
+    async def send_modal(self, modal):
+        async with self._lock:
+            result = await super().send_modal(modal)
+            self._mark()
+            return result
+
+
+class CommandTracer:
+    """
+    Per-command wall time, time-to-first-response and sub-span breakdown,
+    with rolling percentiles over the last `window` runs of every command.
+    """
+
+    # Discord drops interactions that aren't acknowledged within 3 seconds
+    ACK_DEADLINE_SECONDS = 3
+    ACK_WARNING_SECONDS = 2.5
+
+    def __init__(self, window: int = 500, auto_defer_budget: float = 2.0):
+        self.window = window
+        # Seconds a handler gets to respond before it is deferred on its behalf, 0 disables
+        self.auto_defer_budget = auto_defer_budget
+        self.auto_defers: Dict[str, int] = defaultdict(int)
+        self._totals: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._first_responses: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._spans: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.slow_acks: Dict[str, int] = defaultdict(int)
+
+    def begin(self, interaction: discord.Interaction):
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        trace = CommandTrace(command)
+        interaction.extras["trace"] = trace
+        # Pre-fill the cached response slot so every response goes through TracedResponse
+        interaction._cs_response = TracedResponse(interaction)
+        _current_trace.set(trace)
+
+        if self.auto_defer_budget > 0:
+            interaction.extras["auto_defer_handle"] = asyncio.get_running_loop().call_later(
+                self.auto_defer_budget,
+                lambda: asyncio.create_task(self._auto_defer(interaction)),
+            )
+
+    async def _auto_defer(self, interaction: discord.Interaction):
+        command = interaction.command
+        # Commands answering ephemerally set extras={"defer_ephemeral": True}, a deferred
+        # response can't change its visibility later
+        ephemeral = command.extras.get("defer_ephemeral", False) if command else False
+        try:
+            deferred = await interaction.response.auto_defer(ephemeral=ephemeral)
+        except discord.HTTPException:
+            # Too late or already acknowledged elsewhere, the handler's own response decides
+            return
+
+        if deferred:
+            trace = interaction.extras.get("trace")
+            name = trace.command if trace else "unknown"
+            self.auto_defers[name] += 1
+
+    def finish(self, interaction: discord.Interaction, error: Optional[Exception] = None):
+        handle = interaction.extras.pop("auto_defer_handle", None)
+        if handle is not None:
+            handle.cancel()
+
+        trace: Optional[CommandTrace] = interaction.extras.pop("trace", None)
+        if trace is None:
+            return
+
+        name = trace.command
+        total = time.perf_counter() - trace.started
+        self.counts[name] += 1
+        self._totals[name].append(total)
+
+        fields = {
+            "command": name,
+            "guild_id": interaction.guild_id,
+            "latency_ms": round(total * 1000, 2),
+            "spans_ms": {kind: round(seconds * 1000, 2) for kind, seconds in trace.spans.items()},
+        }
+
+        if error is not None:
+            self.errors[name] += 1
+
+        slow_ack = False
+        if trace.first_response is not None:
+            ack = trace.first_response - trace.started
+            fields["ack_ms"] = round(ack * 1000, 2)
+            self._first_responses[name].append(ack)
+            slow_ack = ack >= self.ACK_WARNING_SECONDS
+            if slow_ack:
+                self.slow_acks[name] += 1
+
+        for kind, seconds in trace.spans.items():
+            self._spans[name][kind] += seconds
+
+        if error is not None:
+            log.warning("/%s failed: %r", name, error, extra=fields)
+        elif slow_ack:
+            log.warning("/%s acknowledged after %.2fs (deadline %ss)", name, ack, self.ACK_DEADLINE_SECONDS, extra=fields)
+        else:
+            log.info("/%s completed", name, extra=fields)
+
+    @staticmethod
+    def _percentile(sorted_values: list[float], pct: float) -> float:
+        idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+        return round(sorted_values[idx] * 1000, 2)
+
+    def stats(self) -> dict:
+        stats = {}
+        for name, totals in self._totals.items():
+            values = sorted(totals)
+            acks = sorted(self._first_responses[name])
+            stats[name] = {
+                "count": self.counts[name],
+                "errors": self.errors[name],
+                "slow_acks": self.slow_acks[name],
+                "auto_defers": self.auto_defers[name],
+                "p50_ms": self._percentile(values, 0.50),
+                "p95_ms": self._percentile(values, 0.95),
+                "p99_ms": self._percentile(values, 0.99),
+                "ack_p95_ms": self._percentile(acks, 0.95) if acks else None,
+                "avg_span_ms": {
+                    kind: round(seconds / self.counts[name] * 1000, 2)
+                    for kind, seconds in self._spans[name].items()
+                },
+            }
+        return stats
+
+
+class SnappyCommandTree(app_commands.CommandTree):
+    """Command tree that traces every slash command through client.tracer."""
+
+    async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
+        if interaction.type is discord.InteractionType.application_command:
+            self.client.tracer.begin(interaction)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError, /):
+        self.client.tracer.finish(interaction, error)
+        await super().on_error(interaction, error)